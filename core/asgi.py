@@ -3,6 +3,10 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Async views (task_manager/async_views.py, e.g. the SSE stream /api/events/)
+need this entry point: uvicorn core.asgi:application --workers 4
+With several workers set TASK_EVENTS_BACKEND=task_manager.events.ChangeLogBackend.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -0,0 +1,151 @@
+"""
+Чтение с реплик (settings.DATABASE_REPLICAS) и запись в основную БД.
+
+Куда идёт чтение, решает состояние текущего запроса (RoutingState в contextvar,
+его ставит core.middleware.ReplicaPinningMiddleware):
+- GET/HEAD/OPTIONS — на реплику, одну на весь запрос;
+- остальные методы, запросы после записи (wrote) и код вне HTTP-запроса
+  (команды, сигналы после коммита, фоновые задачи) — на default;
+- внутри transaction.atomic() на default — тоже default.
+После записи middleware ставит cookie и ключ пользователя в кэше: запросы этого
+клиента DATABASE_REPLICAS['STICKY_SECONDS'] секунд читают с default и видят свои изменения.
+
+Реплика, которая отстаёт больше MAX_LAG_SECONDS или не отвечает, исключается
+на RETRY_SECONDS; если здоровых реплик нет — чтение с default. Упавший на
+реплике безопасный запрос middleware повторяет один раз на default.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('core.db_router')
+
+REPLICAS = settings.DATABASE_REPLICAS
+REPLICA_ALIASES = tuple(REPLICAS['ALIASES'])
+
+
+class RoutingState:
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.alias = None
+        self.wrote = False
+        self.replica_failed = False
+
+
+_state = ContextVar('db_routing', default=None)
+
+
+def set_state(state):
+    return _state.set(state)
+
+
+def reset_state(token):
+    _state.reset(token)
+
+
+def get_state():
+    return _state.get()
+
+
+# ---------- health ----------
+def replica_lag(connection):
+    """Отставание реплики в секундах; None — репликация остановлена."""
+    with connection.cursor() as cursor:
+        if connection.vendor != 'mysql':
+            cursor.execute('SELECT 1')
+            return 0
+        for sql in ('SHOW REPLICA STATUS', 'SHOW SLAVE STATUS'):  # MySQL < 8.0.22
+            try:
+                cursor.execute(sql)
+            except DatabaseError:
+                continue
+            row = cursor.fetchone()
+            if row is None:
+                # Не реплика (например, read-only копия): отставания нет
+                return 0
+            status = dict(zip([column[0] for column in cursor.description], row))
+            return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    # Нет прав REPLICATION CLIENT: проверяем только доступность
+    return 0
+
+
+class ReplicaHealth:
+    """Состояние реплик процесса: проверка не чаще CHECK_SECONDS, упавшая — исключена на RETRY_SECONDS."""
+
+    def __init__(self, aliases, options):
+        self.aliases = aliases
+        self.options = options
+        # alias -> (здорова, когда перепроверить)
+        self.status = {}
+        self.lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        healthy, recheck_at = self.status.get(alias, (None, 0))
+        if time.monotonic() < recheck_at:
+            return healthy
+        with self.lock:
+            healthy, recheck_at = self.status.get(alias, (None, 0))
+            if time.monotonic() < recheck_at:
+                return healthy
+            healthy = self.check(alias)
+            delay = self.options['CHECK_SECONDS'] if healthy else self.options['RETRY_SECONDS']
+            self.status[alias] = (healthy, time.monotonic() + delay)
+        return healthy
+
+    def check(self, alias):
+        try:
+            lag = replica_lag(connections[alias])
+        except DatabaseError as exc:
+            logger.warning('Replica %s is unavailable: %s', alias, exc)
+            return False
+        if lag is None or lag > self.options['MAX_LAG_SECONDS']:
+            logger.warning('Replica %s lags behind: %s s', alias, lag)
+            return False
+        return True
+
+    def mark_down(self, alias):
+        logger.warning('Replica %s failed, reading from %s for %s s', alias, DEFAULT_DB_ALIAS, self.options['RETRY_SECONDS'])
+        self.status[alias] = (False, time.monotonic() + self.options['RETRY_SECONDS'])
+
+    def choose(self):
+        healthy = [alias for alias in self.aliases if self.is_healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+
+health = ReplicaHealth(REPLICA_ALIASES, REPLICAS)
+
+
+# ---------- router ----------
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.alias is None:
+            state.alias = health.choose()
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Дальше в этом запросе — только default, клиенту — cookie
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *REPLICA_ALIASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in REPLICA_ALIASES:
+            return False
+        return None
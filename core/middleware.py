@@ -0,0 +1,263 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+
+from core import db_router
+
+logger = logging.getLogger('core.query_budget')
+
+
+class QueryBudgetExceeded(Exception):
+    """Вьюха выполнила больше SQL-запросов, чем разрешено QUERY_BUDGET."""
+
+
+class QueryCounter:
+    """
+    Обёртка для connection.execute_wrapper(): считает запросы и время в БД.
+    Работает без DEBUG и без connection.queries, поэтому годится для production.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# Счётчик текущего запроса. contextvar переходит вместе с запросом в потоки
+# sync_to_async, где async ORM выполняет SQL на своих соединениях.
+_current_counter = ContextVar('query_counter', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    counter = _current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_query_counter(sender=None, connection=None, **kwargs):
+    """Постоянная обёртка на соединение: новые соединения (в любом потоке) — через connection_created."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+connection_created.connect(install_query_counter)
+
+
+class QueryCountMiddleware:
+    """
+    Считает SQL-запросы и время БД на каждый запрос и отдаёт их в заголовках
+    Server-Timing и X-Query-Count.
+
+    Если для вьюхи задан бюджет в settings.QUERY_BUDGET, превышение
+    логируется (MODE='warn') или поднимает QueryBudgetExceeded (MODE='raise',
+    удобно в тестах).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        token = self._instrument(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self._finish(request, response, counter, start)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        token = self._instrument(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_counter.reset(token)
+        return self._finish(request, response, counter, start)
+
+    @staticmethod
+    def _instrument(counter):
+        # Соединения, открытые до загрузки модуля, connection_created не увидел
+        for alias in connections:
+            install_query_counter(connection=connections[alias])
+        return _current_counter.set(counter)
+
+    def _finish(self, request, response, counter, start):
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = counter.duration * 1000
+        response['X-Query-Count'] = str(counter.count)
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{counter.count} queries", total;dur={total_ms:.1f}'
+        )
+        self._check_budget(request, counter)
+        return response
+
+    @staticmethod
+    def _check_budget(request, counter):
+        budget_cfg = getattr(settings, 'QUERY_BUDGET', {})
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return
+        budget = budget_cfg.get('VIEWS', {}).get(match.view_name, budget_cfg.get('DEFAULT'))
+        if budget is None or counter.count <= budget:
+            return
+
+        message = (
+            f'{match.view_name} ({request.method} {request.path}) executed '
+            f'{counter.count} queries, budget is {budget}'
+        )
+        if budget_cfg.get('MODE', 'warn') == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Выбирает БД для чтения на время запроса (core/db_router.py).
+
+    GET/HEAD/OPTIONS читают с реплики, если клиент недавно ничего не писал.
+    Запрос, который что-то записал, на STICKY_SECONDS ставит cookie
+    DATABASE_REPLICAS['COOKIE_NAME'] и, для вошедшего пользователя, ключ
+    db_primary:<user_id> в кэше DATABASE_REPLICAS['CACHE'] — следующие запросы
+    клиента читают с default и видят свои изменения, пока реплика догоняет.
+    Ключ нужен клиентам с Authorization: Bearer: cookie они обычно не хранят,
+    а пользователь известен из токена ещё до аутентификации во вьюхе.
+    Если безопасный запрос упал на реплике, реплика исключается, а запрос
+    повторяется на default.
+    """
+    sync_capable = True
+    async_capable = True
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.options = settings.DATABASE_REPLICAS
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @property
+    def cache(self):
+        return caches[self.options['CACHE']]
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        use_replica = self.may_use_replica(request)
+        if use_replica:
+            key = self.token_user_key(request)
+            use_replica = key is None or not self.cache.get(key)
+        state = db_router.RoutingState(use_replica)
+        token = db_router.set_state(state)
+        try:
+            response = self.get_response(request)
+            if self.should_retry(state):
+                response = self.get_response(request)
+        finally:
+            db_router.reset_state(token)
+        key = self.pin(request, response, state)
+        if key is not None:
+            self.cache.set(key, True, self.options['STICKY_SECONDS'])
+        return response
+
+    async def __acall__(self, request):
+        use_replica = self.may_use_replica(request)
+        if use_replica:
+            key = self.token_user_key(request)
+            use_replica = key is None or not await self.cache.aget(key)
+        state = db_router.RoutingState(use_replica)
+        token = db_router.set_state(state)
+        try:
+            response = await self.get_response(request)
+            if self.should_retry(state):
+                response = await self.get_response(request)
+        finally:
+            db_router.reset_state(token)
+        key = self.pin(request, response, state)
+        if key is not None:
+            await self.cache.aset(key, True, self.options['STICKY_SECONDS'])
+        return response
+
+    def may_use_replica(self, request):
+        return (
+            bool(self.options['ALIASES'])
+            and request.method in self.SAFE_METHODS
+            and self.options['COOKIE_NAME'] not in request.COOKIES
+        )
+
+    def user_key(self, user_id):
+        return f'{self.options["COOKIE_NAME"]}:{user_id}'
+
+    def token_user_key(self, request):
+        """Ключ пользователя из Authorization: Bearer (только подпись и срок, без БД); None — нет токена."""
+        from rest_framework_simplejwt.exceptions import TokenError
+        from rest_framework_simplejwt.settings import api_settings
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        parts = request.headers.get('Authorization', '').split()
+        if len(parts) != 2 or parts[0] not in api_settings.AUTH_HEADER_TYPES:
+            return None
+        try:
+            user_id = AccessToken(parts[1]).get(api_settings.USER_ID_CLAIM)
+        except TokenError:
+            return None
+        return self.user_key(user_id) if user_id is not None else None
+
+    def process_exception(self, request, exception):
+        state = db_router.get_state()
+        if (
+            isinstance(exception, DatabaseError)
+            and state is not None
+            and state.alias in self.options['ALIASES']
+        ):
+            db_router.health.mark_down(state.alias)
+            state.replica_failed = True
+        return None
+
+    @staticmethod
+    def should_retry(state):
+        if not state.replica_failed or state.wrote:
+            return False
+        state.use_replica = False
+        state.alias = None
+        state.replica_failed = False
+        return True
+
+    def pin(self, request, response, state):
+        """Cookie после записи; ключ кэша пользователя, который нужно поставить, или None."""
+        if not state.wrote or not self.options['ALIASES']:
+            return None
+        response.set_cookie(
+            self.options['COOKIE_NAME'], '1',
+            max_age=self.options['STICKY_SECONDS'],
+            httponly=True,
+            secure=settings.CSRF_COOKIE_SECURE,
+            samesite=settings.CSRF_COOKIE_SAMESITE,
+        )
+        # DRF кладёт пользователя из токена и в request.user исходного HttpRequest
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return self.user_key(user.pk)
+        return None
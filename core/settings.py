@@ -95,6 +95,18 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        # 5) Превышение бюджета запросов (core.middleware.QueryCountMiddleware)
+        'core.query_budget': {
+            'handlers': ['console', 'http_file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        # 6) Реплики БД: отставание и недоступность (core/db_router.py)
+        'core.db_router': {
+            'handlers': ['console', 'http_file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
@@ -130,7 +142,7 @@ INSTALLED_APPS = [
 # Add DRF settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CookieJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -139,6 +151,51 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 5,
 }
 
+# Потоковая выгрузка /api/tasks/export/: задач на одну пачку (и верхняя граница для ?chunk_size=)
+TASK_EXPORT_CHUNK_SIZE = int(os.getenv('TASK_EXPORT_CHUNK_SIZE', 2000))
+TASK_EXPORT_MAX_CHUNK_SIZE = 10000
+
+# Максимум задач в одном запросе POST /api/tasks/bulk/
+TASK_BULK_MAX_BATCH = int(os.getenv('TASK_BULK_MAX_BATCH', 500))
+# Максимум объектов, которые меняет один POST /api/tasks|subtasks/bulk-status/ по фильтру
+TASK_BULK_STATUS_MAX_ROWS = int(os.getenv('TASK_BULK_STATUS_MAX_ROWS', 5000))
+
+# HTML-список задач (task_manager.views.tasks): задач на странице
+TASKS_PAGE_SIZE = int(os.getenv('TASKS_PAGE_SIZE', 50))
+# ... и до скольких задач считать общее число; больше — «1000+»
+TASKS_COUNT_LIMIT = int(os.getenv('TASKS_COUNT_LIMIT', 1000))
+# Страница задачи (task_manager.views.task_detail): подзадач на странице
+SUBTASKS_PAGE_SIZE = int(os.getenv('SUBTASKS_PAGE_SIZE', 50))
+
+# Сводка /api/tasks/my/summary/cached/: сколько секунд живёт запись (task_manager/summary.py)
+TASK_SUMMARY_CACHE_SECONDS = int(os.getenv('TASK_SUMMARY_CACHE_SECONDS', 60))
+
+# Фрагменты строк задач и подзадач в HTML-страницах (task_manager/templatetags/task_fragments.py)
+TEMPLATE_FRAGMENT_CACHE_SECONDS = int(os.getenv('TEMPLATE_FRAGMENT_CACHE_SECONDS', 3600))
+
+# Сколько последних подзадач встраивать в каждую задачу списков /api/tasks/ и /api/tasks/my/
+# (?subtasks_limit= до максимума). Полный список — /api/tasks/<id>/ или /api/subtasks/?task=<id>
+TASK_SUBTASKS_EMBED_LIMIT = int(os.getenv('TASK_SUBTASKS_EMBED_LIMIT', 5))
+TASK_SUBTASKS_EMBED_MAX_LIMIT = 50
+
+# SSE-поток /api/events/ (task_manager/events.py, только под ASGI).
+# BACKEND: LocalBackend — события своего процесса; ChangeLogBackend — опрос ChangeLog для нескольких воркеров.
+TASK_EVENTS = {
+    'BACKEND': os.getenv('TASK_EVENTS_BACKEND', 'task_manager.events.LocalBackend'),
+    'BUFFER_SIZE': 100,
+    'HEARTBEAT_SECONDS': 15,
+    'POLL_SECONDS': 1,
+}
+
+# Лента изменений /api/changes/ (task_manager/changes.py).
+# SETTLE_SECONDS — записи моложе не отдаются; RETENTION_DAYS — сколько хранит prune_changes.
+CHANGES_FEED = {
+    'PAGE_SIZE': 200,
+    'MAX_PAGE_SIZE': 1000,
+    'SETTLE_SECONDS': float(os.getenv('CHANGES_FEED_SETTLE_SECONDS', 1)),
+    'RETENTION_DAYS': int(os.getenv('CHANGES_RETENTION_DAYS', 30)),
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=120),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -148,7 +205,28 @@ SIMPLE_JWT = {
     'SIGNING_KEY': SECRET_KEY,
 }
 
+# Пользователь access-токена в кэше процесса по jti (users/authentication.py).
+# Версии пользователей и отозванные при выходе jti — в кэше CACHE: с общим
+# кэшем деактивацию и выход сразу видят все воркеры. TTL — срок записи в процессе.
+JWT_USER_CACHE = {
+    'TTL': int(os.getenv('JWT_USER_CACHE_TTL', 30)),
+    'SIZE': 10000,
+    'CACHE': 'default',
+}
+
+# Кэш чёрного списка refresh-токенов (users/tokens.py): LRU_SIZE последних
+# отозванных в процессе jti, отзывы всех процессов в кэше CACHE и фильтр Блума
+# на CAPACITY jti из БД. С LocMemCache без БД отклоняются только jti из LRU.
+TOKEN_BLACKLIST_CACHE = {
+    'LRU_SIZE': 10000,
+    'CAPACITY': 200000,
+    'ERROR_RATE': 0.01,
+    'CACHE': 'default',
+}
+
 MIDDLEWARE = [
+    'core.middleware.QueryCountMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -158,6 +236,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Бюджет SQL-запросов на вьюху (по resolver_match.view_name).
+# MODE: 'warn' — писать в лог core.query_budget, 'raise' — падать (для тестов).
+QUERY_BUDGET = {
+    'MODE': os.getenv('QUERY_BUDGET_MODE', 'warn'),
+    'DEFAULT': None,
+    'VIEWS': {
+        'task_manager_api:task-list-create': 10,
+        'task_manager_api:task-detail': 10,
+        'task_manager_api:my-tasks': 10,
+        'task_manager_api:my-tasks-summary': 5,
+        'task_manager_api:my-tasks-summary-cached': 5,
+        'task_manager_api:subtask-list-create': 10,
+        'task_manager_api:subtask-detail': 10,
+        'task_manager_api:task-analytics': 10,
+        'task_manager_api:changes': 10,
+        'task_manager_api:async-task-list': 10,
+        'task_manager_api:async-my-tasks': 10,
+        'task_manager_api:async-subtask-list': 10,
+        'task_manager_api:async-task-analytics': 10,
+    },
+}
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -165,8 +265,15 @@ TEMPLATES = [
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates']
         ,
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны хранятся в процессе; в DEBUG runserver
+            # сбрасывает их при изменении файла шаблона
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -192,6 +299,7 @@ if config.get('MYSQL', 'False').lower() == 'true':
             'PORT': os.getenv('DATABASE_PORT'),
         }
     }
+    SEARCH_BACKEND = 'task_manager.search.MySQLFulltextSearchBackend'
 else:
     DATABASES = {
         'default': {
@@ -199,6 +307,59 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    SEARCH_BACKEND = 'task_manager.search.SQLiteFTS5SearchBackend'
+
+# Реплики только для чтения (core/db_router.py): DATABASE_REPLICA_HOSTS=host[:port],...
+# Те же NAME/USER/PASSWORD, что у default. Без реплик всё идёт в default.
+REPLICA_HOSTS = [host for host in os.getenv('DATABASE_REPLICA_HOSTS', '').split(',') if host]
+for index, replica_host in enumerate(REPLICA_HOSTS, start=1):
+    host, _, port = replica_host.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default'].get('PORT'),
+        # В тестах реплика — та же тестовая БД
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+DATABASE_REPLICAS = {
+    'ALIASES': [f'replica{index}' for index in range(1, len(REPLICA_HOSTS) + 1)],
+    # Сколько секунд после записи клиент читает с default (должно покрывать MAX_LAG_SECONDS)
+    'STICKY_SECONDS': int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 10)),
+    'MAX_LAG_SECONDS': int(os.getenv('DATABASE_REPLICA_MAX_LAG_SECONDS', 5)),
+    'CHECK_SECONDS': 5,
+    'RETRY_SECONDS': 30,
+    'COOKIE_NAME': 'db_primary',
+    # Там же ключ db_primary:<user_id> для клиентов без cookie (Authorization: Bearer)
+    'CACHE': 'default',
+}
+
+# Кэш (сводки задач и т.п.). По умолчанию — в памяти процесса;
+# для нескольких воркеров — общий, например CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# и CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # {% cache %} в шаблонах task_manager берёт этот кэш сам. Ключи версионные
+    # (id + updated_at), старые фрагменты просто вытесняются; в памяти процесса —
+    # отдельное хранилище, чтобы строки списков не вытесняли сводки
+    'template_fragments': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', 'template_fragments'),
+        'KEY_PREFIX': 'fragments',
+    },
+}
+if CACHE_BACKEND.endswith('LocMemCache'):
+    CACHES['template_fragments']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('TEMPLATE_FRAGMENT_CACHE_ENTRIES', 5000))}
+
+# Полнотекстовый поиск для ?search= (task_manager/search.py).
+# SEARCH_BACKEND=icontains в окружении возвращает старый LIKE '%term%'.
+if os.getenv('SEARCH_BACKEND') == 'icontains':
+    SEARCH_BACKEND = 'task_manager.search.IContainsSearchBackend'
 
 CSRF_COOKIE_SECURE = os.getenv('COOKIE_SECURE', 'False').lower() == 'true'
 CSRF_COOKIE_SAMESITE = os.getenv('COOKIE_SAMESITE', 'Lax')
@@ -255,6 +416,25 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+# collectstatic: имена с хешем содержимого + .gz/.br рядом (core/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Отдавать STATIC_ROOT из Django (core/static.py), если перед ним нет nginx/CDN.
+# С DEBUG статику и так отдаёт runserver — из исходных каталогов.
+SERVE_STATIC = os.getenv('SERVE_STATIC', 'False').lower() == 'true'
+STATIC_MAX_AGE = {
+    'HASHED': 365 * 24 * 60 * 60,
+    'DEFAULT': int(os.getenv('STATIC_MAX_AGE', 60 * 60)),
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
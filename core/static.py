@@ -0,0 +1,76 @@
+"""
+Раздача STATIC_ROOT самим Django, когда перед ним нет nginx/CDN (SERVE_STATIC=True).
+
+- Файл с хешем в имени (collectstatic, core/storage.py) не меняется никогда:
+  Cache-Control: public, max-age=год, immutable. Остальные — STATIC_MAX_AGE['DEFAULT'].
+- Если клиент принимает br или gzip и рядом лежит .br/.gz — отдаётся он
+  с Content-Encoding и Vary: Accept-Encoding.
+- If-Modified-Since -> 304.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+# ManifestStaticFilesStorage добавляет 12 hex-символов md5: base.3f2a1c9b0d4e.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def accepted_encodings(request):
+    header = request.headers.get('Accept-Encoding', '')
+    accepted = set()
+    for part in header.split(','):
+        coding, *params = part.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+@require_safe
+def serve(request, path):
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        # Путь за пределами STATIC_ROOT
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    encoding = None
+    accepted = accepted_encodings(request)
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(fullpath + suffix):
+            encoding, fullpath = coding, fullpath + suffix
+            break
+
+    response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_NAME.search(path):
+        response.headers['Cache-Control'] = f'public, max-age={settings.STATIC_MAX_AGE["HASHED"]}, immutable'
+    else:
+        response.headers['Cache-Control'] = f'public, max-age={settings.STATIC_MAX_AGE["DEFAULT"]}'
+    return response
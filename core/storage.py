@@ -0,0 +1,62 @@
+"""
+Хранилище статики для collectstatic: ManifestStaticFilesStorage + сжатые копии.
+
+Имена файлов получают хеш содержимого (base.3f2a1c.css), {% static %} берёт
+их из staticfiles.json. Рядом с каждым текстовым файлом collectstatic кладёт
+.gz и, если установлен пакет brotli, .br — сервер (core/static.py или nginx с
+gzip_static/brotli_static) отдаёт готовый файл без сжатия на каждый запрос.
+
+Без staticfiles.json (collectstatic не запускался — разработка, тесты)
+{% static %} отдаёт исходные имена, как StaticFilesStorage.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+COMPRESSED_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+# На файлах меньше этого сжатие почти ничего не даёт
+MIN_SIZE = 200
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed = set()
+        for name, hashed_name, result in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(result, Exception):
+                processed.update((name, hashed_name))
+            yield name, hashed_name, result
+        if dry_run:
+            return
+        for name in sorted(processed):
+            if name.endswith(COMPRESSED_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_SIZE:
+            return
+        # mtime=0: одинаковый файл — одинаковый .gz при каждой сборке
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        for suffix, compressed in variants:
+            # Сжатый файл не меньше исходного бесполезен
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
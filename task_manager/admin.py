@@ -4,6 +4,8 @@ from django.utils.html import format_html
 from django.contrib import messages
 from django.http import HttpResponseRedirect
 from django.urls import reverse
+from django.utils import timezone
+from . import changes
 from .models import Task, SubTask, Category
 
 
@@ -104,8 +106,11 @@ class SubTaskAdmin(admin.ModelAdmin):
             )
             return
 
-        # Обновляем статус подзадач
-        updated_count = subtasks_to_update.update(status='DONE')
+        # Обновляем статус подзадач; update() обходит auto_now и сигналы — updated_at явно
+        task_ids = set(subtasks_to_update.values_list('task_id', flat=True))
+        changes.record_queryset(subtasks_to_update, changes.UPDATED)
+        updated_count = subtasks_to_update.update(status='DONE', updated_at=timezone.now())
+        Task.objects.filter(pk__in=task_ids).touch()
 
         # Показываем сообщение о результате
         if updated_count == 1:
@@ -4,9 +4,21 @@ from rest_framework.routers import DefaultRouter
 from .api_views import (
     TaskListCreateAPIView,
     TaskRetrieveUpdateDestroyAPIView,
+    TaskExportAPIView,
+    TaskBulkCreateAPIView,
+    TaskBulkStatusAPIView,
+    SubTaskBulkStatusAPIView,
     SubTaskListCreateAPIView,
     SubTaskRetrieveUpdateDestroyAPIView,
-    task_analytics_api_view, CategoryViewSet, MyTasksListAPIView,
+    task_analytics_api_view, CategoryViewSet, MyTasksListAPIView, ChangeFeedAPIView,
+    my_tasks_summary_api_view, my_tasks_summary_cached_api_view,
+)
+from .async_views import (
+    task_events_stream,
+    task_list_async_view,
+    subtask_list_async_view,
+    my_tasks_async_view,
+    task_analytics_async_view,
 )
 
 app_name = 'task_manager_api'
@@ -22,11 +34,27 @@ urlpatterns = [
     path('tasks/', TaskListCreateAPIView.as_view(), name='task-list-create'),
     path('tasks/<int:pk>/', TaskRetrieveUpdateDestroyAPIView.as_view(), name='task-detail'),
     path('tasks/my/', MyTasksListAPIView.as_view(), name='my-tasks'),
+    path('tasks/my/summary/', my_tasks_summary_api_view, name='my-tasks-summary'),
+    path('tasks/my/summary/cached/', my_tasks_summary_cached_api_view, name='my-tasks-summary-cached'),
+    path('tasks/export/', TaskExportAPIView.as_view(), name='task-export'),
+    path('tasks/bulk/', TaskBulkCreateAPIView.as_view(), name='task-bulk-create'),
+    path('tasks/bulk-status/', TaskBulkStatusAPIView.as_view(), name='task-bulk-status'),
 
     # SubTasks
     path('subtasks/', SubTaskListCreateAPIView.as_view(), name='subtask-list-create'),
     path('subtasks/<int:pk>/', SubTaskRetrieveUpdateDestroyAPIView.as_view(), name='subtask-detail'),
+    path('subtasks/bulk-status/', SubTaskBulkStatusAPIView.as_view(), name='subtask-bulk-status'),
+
+    # Change feed
+    path('changes/', ChangeFeedAPIView.as_view(), name='changes'),
+    path('events/', task_events_stream, name='task-events'),
 
     # Analytics (оставляем как есть)
     path('tasks/analytics/', task_analytics_api_view, name='task-analytics'),
+
+    # Async GET-варианты (только под ASGI, см. task_manager/async_views.py)
+    path('async/tasks/', task_list_async_view, name='async-task-list'),
+    path('async/tasks/my/', my_tasks_async_view, name='async-my-tasks'),
+    path('async/tasks/analytics/', task_analytics_async_view, name='async-task-analytics'),
+    path('async/subtasks/', subtask_list_async_view, name='async-subtask-list'),
 ]
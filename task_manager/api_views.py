@@ -1,19 +1,33 @@
+from collections import Counter
+
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, action, permission_classes
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Count
+from django.db.models import Count, Q
+from . import bulk, changes, counters, export, summary
 from .permissions import IsOwnerOrReadOnly
+from .conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from .fieldsets import parse_list
+from .filters import FilterBackend, SubTaskFilterSet, TaskFilterSet
+from .loading import EagerLoadingMixin
+from .pagination import AsyncPageNumberPagination
+from .search import FullTextSearchFilter, RelevanceOrderingFilter
 from .models import Task, Category, SubTask
 from .serializers import (
     TaskSerializer,
+    TaskRetrieveSerializer,
     TaskCreateSerializer,
+    TaskBulkItemSerializer,
+    BulkStatusSerializer,
     SubTaskSerializer,
     SubTaskCreateSerializer, CategoryCreateSerializer, CategorySerializer,
 )
@@ -25,7 +39,7 @@ class CategoryCursorPagination(CursorPagination):
     page_size_query_param = None
 
 
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(ConditionalListMixin, ConditionalRetrieveMixin, EagerLoadingMixin, ModelViewSet):
     """
     Полный CRUD для категорий.
     - Мягкое удаление в destroy()
@@ -33,7 +47,7 @@ class CategoryViewSet(ModelViewSet):
     """
     permission_classes = [IsAuthenticatedOrReadOnly]
     queryset = Category.objects.all().order_by('name')
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [FilterBackend]
     filterset_fields = ['name']
     pagination_class = CategoryCursorPagination
 
@@ -63,27 +77,28 @@ class CategoryViewSet(ModelViewSet):
         return Response(list(data), status=status.HTTP_200_OK)
 
 
-class SubTaskPagination(PageNumberPagination):
+class SubTaskPagination(AsyncPageNumberPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
 # ========== Tasks ==========
-class TaskListCreateAPIView(generics.ListCreateAPIView):
+class TaskListCreateAPIView(ConditionalListMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     """
     List + Create tasks.
-    Фильтрация: status, deadline (__gte/__lte).
-    Поиск: title, description.
+    Фильтрация: status, category, deadline (__gte/__lte), created_from/_to и deadline_from/_to
+    (даты, см. task_manager/filters.py).
+    Поиск: title, description (полнотекстовый, см. task_manager/search.py).
     Сортировка: created_at (по умолчанию -created_at).
+    Подзадачи: последние ?subtasks_limit= на задачу + subtasks_count/subtasks_by_status.
+    Поля: ?fields=id,title и ?expand=subtasks,categories (см. task_manager/fieldsets.py).
     """
     permission_classes = [IsAuthenticatedOrReadOnly]
-    queryset = Task.objects.all().prefetch_related('categories', 'subtasks').order_by('-created_at')
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = {
-        'status': ['exact'],
-        'deadline': ['exact', 'gte', 'lte'],
-    }
+    queryset = Task.objects.all().order_by('-created_at')
+    conditional_dependencies = [Category]  # категории встроены в ответ
+    filter_backends = [FilterBackend, FullTextSearchFilter, RelevanceOrderingFilter]
+    filterset_class = TaskFilterSet
     search_fields = ['title', 'description']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
@@ -97,37 +112,114 @@ class TaskListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class TaskRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class TaskExportAPIView(generics.GenericAPIView):
+    """
+    Потоковая выгрузка задач с подзадачами и категориями.
+    Формат: ?export_format=ndjson (по умолчанию) или csv.
+    Фильтры те же, что у TaskListCreateAPIView (status, deadline__gte/__lte).
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    queryset = Task.objects.all()
+    filter_backends = [FilterBackend]
+    filterset_class = TaskFilterSet
+    pagination_class = None
+
+    formats = {
+        'ndjson': (export.stream_ndjson, 'application/x-ndjson'),
+        'csv': (export.stream_csv, 'text/csv'),
+    }
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.formats:
+            raise ValidationError({'export_format': f'Supported formats: {", ".join(self.formats)}.'})
+
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', settings.TASK_EXPORT_CHUNK_SIZE))
+        except ValueError:
+            raise ValidationError({'chunk_size': 'A valid integer is required.'})
+        chunk_size = max(1, min(chunk_size, settings.TASK_EXPORT_MAX_CHUNK_SIZE))
+
+        queryset = self.filter_queryset(self.get_queryset())
+        stream, content_type = self.formats[export_format]
+        content = stream(queryset, chunk_size)
+        if isinstance(request._request, ASGIRequest):
+            content = export.astream(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+
+class TaskBulkCreateAPIView(generics.GenericAPIView):
+    """
+    Пакетное создание задач: тело запроса — список объектов как для POST /api/tasks/.
+    Всё выполняется в одной транзакции; для каждого элемента возвращается
+    свой результат (created + id или error + errors).
+    201 — создано всё, 207 — частично, 400 — ничего.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = TaskBulkItemSerializer
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'detail': 'Expected a non-empty list of tasks.'})
+        if len(items) > settings.TASK_BULK_MAX_BATCH:
+            raise ValidationError({'detail': f'At most {settings.TASK_BULK_MAX_BATCH} tasks per request.'})
+
+        try:
+            results = bulk.bulk_create_tasks(items, owner=request.user)
+        except IntegrityError:
+            # Кто-то параллельно занял тот же title — транзакция откачена целиком
+            return Response({'detail': 'Conflict with concurrent changes, nothing was created. Retry the batch.'},
+                            status=status.HTTP_409_CONFLICT)
+
+        created = sum(1 for r in results if r['status'] == 'created')
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results,
+        }, status=response_status)
+
+
+class TaskRetrieveUpdateDestroyAPIView(ConditionalRetrieveMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve + Update + Destroy task.
+    Подзадачи — все (последние ?subtasks_limit=, если задан).
     """
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    queryset = Task.objects.all().prefetch_related('categories', 'subtasks')
+    queryset = Task.objects.all()
+    conditional_dependencies = [Category]
     lookup_field = 'pk'
 
     def get_serializer_class(self):
-        # Для чтения — полный TaskSerializer; для обновления — TaskCreateSerializer
+        # Для чтения — все подзадачи (TaskRetrieveSerializer); для обновления — TaskCreateSerializer
         if self.request and self.request.method in ['PUT', 'PATCH']:
             return TaskCreateSerializer
-        return TaskSerializer
+        return TaskRetrieveSerializer
 
 
 # ========== SubTasks ==========
-class SubTaskListCreateAPIView(generics.ListCreateAPIView):
+class SubTaskListCreateAPIView(ConditionalListMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     """
     List + Create subtasks.
-    Фильтрация: status, deadline (__gte/__lte).
-    Поиск: title, description.
+    Фильтрация: task, status, deadline (__gte/__lte), created_from/_to и deadline_from/_to
+    (даты, см. task_manager/filters.py).
+    Поиск: title, description (полнотекстовый, см. task_manager/search.py).
     Сортировка: created_at (по умолчанию -created_at).
     Пагинация: 5 на страницу.
+    Поля: ?fields=id,title (см. task_manager/fieldsets.py).
     """
     permission_classes = [IsAuthenticatedOrReadOnly]
-    queryset = SubTask.objects.select_related('task').all().order_by('-created_at')
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = {
-        'status': ['exact'],
-        'deadline': ['exact', 'gte', 'lte'],
-    }
+    queryset = SubTask.objects.all().order_by('-created_at')
+    filter_backends = [FilterBackend, FullTextSearchFilter, RelevanceOrderingFilter]
+    filterset_class = SubTaskFilterSet
     search_fields = ['title', 'description']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
@@ -145,12 +237,12 @@ class SubTaskListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class SubTaskRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class SubTaskRetrieveUpdateDestroyAPIView(ConditionalRetrieveMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve + Update + Destroy subtask.
     """
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    queryset = SubTask.objects.select_related('task').all()
+    queryset = SubTask.objects.all()
     lookup_field = 'pk'
 
     def get_serializer_class(self):
@@ -158,63 +250,218 @@ class SubTaskRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView)
             return SubTaskCreateSerializer
         return SubTaskSerializer
 
-class MyTasksListAPIView(generics.ListAPIView):
+# ========== Change feed ==========
+class ChangeFeedAPIView(generics.GenericAPIView):
+    """
+    Изменения задач, подзадач и категорий после курсора (см. task_manager/changes.py).
+    ?since=<cursor> — курсор из предыдущего ответа; без него отдаётся только текущий курсор.
+    ?limit= — записей журнала на страницу, ?types=task,subtask,category — только эти типы.
+    Ответ: {"changes": [{"type", "id", "action", "data"}], "next_cursor", "has_more"};
+    для action="deleted" data — null. 410 — курсор устарел, нужна полная синхронизация.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        options = settings.CHANGES_FEED
+        since = request.query_params.get('since')
+        if not since:
+            position = changes.current_position()
+            return Response({'changes': [], 'next_cursor': changes.encode_cursor(position), 'has_more': False})
+
+        try:
+            position = changes.decode_cursor(since)
+        except changes.CursorError as exc:
+            raise ValidationError({'since': str(exc)})
+        try:
+            limit = int(request.query_params.get('limit', options['PAGE_SIZE']))
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        limit = max(1, min(limit, options['MAX_PAGE_SIZE']))
+        kinds = parse_list(request.query_params.get('types'))
+        unknown = set(kinds or ()) - set(changes.FEED_MODELS)
+        if unknown:
+            raise ValidationError({'types': f'Unknown types: {", ".join(sorted(unknown))}.'})
+
+        if changes.is_expired(position):
+            return Response({'detail': 'Cursor has expired, full resync required.'}, status=status.HTTP_410_GONE)
+        items, position, has_more = changes.read_changes(position, limit, kinds)
+        return Response({'changes': items, 'next_cursor': changes.encode_cursor(position), 'has_more': has_more})
+
+
+# ========== Bulk status ==========
+class BulkStatusUpdateAPIView(generics.GenericAPIView):
+    """
+    Массовая смена статуса одним UPDATE.
+    Тело: {"status": "DONE", "ids": [1, 2, 3]} — явный список,
+    или {"status": "DONE"} + фильтры списка в query string (?status=NEW&deadline__lte=...).
+    Меняются только объекты текущего пользователя (как в IsOwnerOrReadOnly).
+    Под фильтр может попасть не больше TASK_BULK_STATUS_MAX_ROWS объектов, иначе 400:
+    блокировки и id держатся в одной транзакции.
+    Ответ — id реально изменённых объектов.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BulkStatusSerializer
+    filter_backends = [FilterBackend, FullTextSearchFilter]
+    search_fields = ['title', 'description']
+    update_chunk_size = 500
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+        ids = serializer.validated_data.get('ids')
+
+        queryset = self.get_queryset().filter(owner=request.user)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        elif not self.has_filters(queryset):
+            raise ValidationError({'detail': 'Pass "ids" or at least one filter in the query string.'})
+        queryset = self.filter_queryset(queryset).exclude(status=new_status).order_by()
+
+        limit = settings.TASK_BULK_STATUS_MAX_ROWS
+        with transaction.atomic():
+            rows = list(queryset.select_for_update().values_list('pk', 'status')[:limit + 1])
+            if len(rows) > limit:
+                raise ValidationError({'detail': f'The filter matches more than {limit} objects. '
+                                                 'Narrow it down or pass "ids".'})
+            affected = [pk for pk, _ in rows]
+            model = queryset.model
+            now = timezone.now()
+            for start in range(0, len(affected), self.update_chunk_size):
+                chunk = affected[start:start + self.update_chunk_size]
+                model.objects.filter(pk__in=chunk).update(status=new_status, updated_at=now)
+            changes.record(model, changes.UPDATED, [(pk, request.user.pk) for pk in affected])
+            self.after_update(rows, new_status)
+
+        data = {'status': new_status, 'updated': len(affected), 'ids': affected}
+        if ids is not None:
+            data['skipped'] = sorted(set(ids) - set(affected))
+        return Response(data, status=status.HTTP_200_OK)
+
+    def has_filters(self, queryset):
+        if self.request.query_params.get(FullTextSearchFilter.search_param):
+            return True
+        filterset = FilterBackend().get_filterset(self.request, queryset, self)
+        if filterset is None:
+            return False
+        if not filterset.is_valid():
+            return True  # filter_queryset ответит 400 с ошибками фильтров
+        return any(value not in (None, '', []) for value in filterset.form.cleaned_data.values())
+
+    def after_update(self, rows, new_status):
+        """Хук для побочных эффектов, которые UPDATE обходит (сигналы не вызываются)."""
+
+
+class TaskBulkStatusAPIView(BulkStatusUpdateAPIView):
+    queryset = Task.objects.all()
+    filterset_class = TaskFilterSet
+
+    def after_update(self, rows, new_status):
+        deltas = Counter()
+        for _, old_status in rows:
+            deltas[counters.status_key(old_status)] -= 1
+            deltas[counters.status_key(new_status)] += 1
+        counters.bump(deltas)
+
+
+class SubTaskBulkStatusAPIView(BulkStatusUpdateAPIView):
+    queryset = SubTask.objects.all()
+    filterset_class = SubTaskFilterSet
+
+    def after_update(self, rows, new_status):
+        affected = [pk for pk, _ in rows]
+        for start in range(0, len(affected), self.update_chunk_size):
+            chunk = affected[start:start + self.update_chunk_size]
+            Task.objects.filter(pk__in=SubTask.objects.filter(pk__in=chunk).values('task_id')).touch()
+
+
+class MyTasksListAPIView(ConditionalListMixin, EagerLoadingMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = TaskSerializer
+    queryset = Task.objects.all().order_by('-created_at')
+    conditional_dependencies = [Category]
 
     def get_queryset(self):
-        return Task.objects.filter(owner=self.request.user).prefetch_related('categories', 'subtasks').order_by('-created_at')
+        return super().get_queryset().filter(owner=self.request.user)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def my_tasks_summary_api_view(request):
+    """
+    Сводка задач текущего пользователя для дашборда одним запросом (task_manager/summary.py):
+    итоги, статусы, overdue/upcoming (7 дней) и разбивка по категориям.
+    """
+    return Response(summary.compute(request.user))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def my_tasks_summary_cached_api_view(request):
+    """То же из кэша: сбрасывается при изменении задач пользователя, живёт TASK_SUMMARY_CACHE_SECONDS."""
+    data, hit = summary.cached(request.user)
+    response = Response(data)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def task_analytics_api_view(request):
-    """API endpoint for task analytics and statistics"""
-
-    # Get current time for overdue calculation
-    now = timezone.now()
+    """
+    API endpoint for task analytics and statistics.
+    Итоги, статусы и категории читаются из предрасчитанных счётчиков (TaskCounter),
+    overdue/upcoming зависят от now и считаются одним запросом по индексу (status, deadline).
+    Async-вариант — async_views.task_analytics_async_view.
+    """
+    time_queryset, time_aggregates = analytics_time_query(timezone.now())
+    return Response(build_analytics(
+        counters.read(),
+        time_queryset.aggregate(**time_aggregates),
+        Category.objects.values_list('id', 'name'),
+    ))
 
-    # Total tasks count
-    total_tasks = Task.objects.count()
 
-    # Count tasks by status
-    status_counts = Task.objects.values('status').annotate(
-        count=Count('id')
-    ).order_by('status')
+def analytics_time_query(now):
+    """
+    Overdue (deadline passed and not completed) and due in next 7 days:
+    один проход по диапазону индекса status IN (...) AND deadline <= next_week.
+    """
+    next_week = now + timezone.timedelta(days=7)
+    open_statuses = ['NEW', 'IN_PROGRESS', 'PENDING', 'BLOCKED']
+    queryset = Task.objects.filter(status__in=open_statuses, deadline__lte=next_week)
+    aggregates = {
+        'overdue': Count('id', filter=Q(deadline__lt=now)),
+        'upcoming': Count('id', filter=Q(deadline__gte=now)),
+    }
+    return queryset, aggregates
 
-    # Convert to dictionary for easier handling
-    status_stats = {item['status']: item['count'] for item in status_counts}
 
-    # Ensure all statuses are represented
+def build_analytics(stored, time_stats, categories):
+    """Ответ аналитики из счётчиков, overdue/upcoming и пар (id, name) категорий."""
+    # Total tasks count and counts by status
+    total_tasks = stored.get(counters.TOTAL_KEY, 0)
     all_statuses = ['NEW', 'IN_PROGRESS', 'PENDING', 'BLOCKED', 'DONE']
-    for status_choice in all_statuses:
-        if status_choice not in status_stats:
-            status_stats[status_choice] = 0
+    status_stats = {s: stored.get(counters.status_key(s), 0) for s in all_statuses}
 
-    # Count overdue tasks (deadline passed and not completed)
-    overdue_tasks = Task.objects.filter(
-        deadline__lt=now,
-        status__in=['NEW', 'IN_PROGRESS', 'PENDING', 'BLOCKED']
-    ).count()
+    overdue_tasks = time_stats['overdue']
+    upcoming_tasks = time_stats['upcoming']
 
     # Additional analytics
     completed_tasks = status_stats.get('DONE', 0)
     in_progress_tasks = status_stats.get('IN_PROGRESS', 0)
 
-    # Tasks due in next 7 days
-    next_week = now + timezone.timedelta(days=7)
-    upcoming_tasks = Task.objects.filter(
-        deadline__gte=now,
-        deadline__lte=next_week,
-        status__in=['NEW', 'IN_PROGRESS', 'PENDING', 'BLOCKED']
-    ).count()
-
     # Category statistics
-    category_stats = Category.objects.annotate(
-        task_count=Count('task')
-    ).values('name', 'task_count').order_by('-task_count')
-
-    analytics_data = {
+    category_stats = sorted(
+        (
+            {'name': name, 'task_count': stored.get(counters.category_key(category_id), 0)}
+            for category_id, name in categories
+        ),
+        key=lambda item: -item['task_count'],
+    )
+
+    return {
         'summary': {
             'total_tasks': total_tasks,
             'completed_tasks': completed_tasks,
@@ -223,12 +470,10 @@ def task_analytics_api_view(request):
             'upcoming_tasks': upcoming_tasks,
         },
         'status_breakdown': status_stats,
-        'category_breakdown': list(category_stats),
+        'category_breakdown': category_stats,
         'time_analysis': {
             'overdue_count': overdue_tasks,
             'upcoming_due_count': upcoming_tasks,
             'completion_rate': round((completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 2)
         }
     }
-
-    return Response(analytics_data)
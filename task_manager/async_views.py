@@ -0,0 +1,197 @@
+"""
+Async-вьюхи. Работают только под ASGI (core/asgi.py, например
+uvicorn core.asgi:application): под WSGI каждая оборачивается в async_to_sync.
+
+async_list_view(view_class) — GET-вариант generic-вьюхи DRF на async ORM:
+те же permission_classes, фильтры, ?fields=/?expand=, eager loading, пагинация
+и ETag, что у view_class, но запросы — через aaggregate/acount/aiterator/aget,
+а ответ рендерится JSONRenderer прямо в event loop. Исключение — страница
+GlobalCursorPagination (списки задач): она выбирается синхронным DRF-кодом в
+sync_to_async (pagination.py). Аутентификация — та же, что у синхронных вьюх:
+только JWT (CookieJWTAuthentication), без сессии. DRF dispatch синхронный,
+поэтому он не используется: поток занят только на время самих запросов к БД,
+а не на весь запрос. Ленивые обращения к БД (N+1) здесь падают с
+SynchronousOnlyOperation — всё нужное объявляет сериализатор (loading.py).
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+from users.authentication import CookieJWTAuthentication, user_cache
+
+from . import counters, events
+from .api_views import (
+    MyTasksListAPIView,
+    SubTaskListCreateAPIView,
+    TaskListCreateAPIView,
+    analytics_time_query,
+    build_analytics,
+)
+from .models import Category
+from .search import FullTextSearchFilter
+
+
+async def aauthenticate(request):
+    """
+    (user, token) из заголовка Authorization: Bearer или cookie с access-токеном —
+    как CookieJWTAuthentication у синхронных вьюх (сессия не принимается);
+    (None, None) — без учётных данных. Неверный токен — AuthenticationFailed, как в DRF.
+    """
+    authentication = CookieJWTAuthentication()
+    raw_token, _ = authentication.get_raw_token_from_request(request)
+    if raw_token is None:
+        return None, None
+
+    token = authentication.get_validated_token(raw_token)
+    ids = authentication.token_ids(token)
+    if ids is None:
+        return await sync_to_async(authentication.get_user)(token), token
+    # Пользователь из кэша по jti — без похода в поток
+    state = await user_cache.astate(*ids)
+    user = authentication.get_cached_user(token, state)
+    if user is None:
+        user = await sync_to_async(authentication.load_user)(token, state)
+    return user, token
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def error_response(exc, context):
+    response = exception_handler(exc, context)
+    if response is None:
+        raise exc
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response.status_code = 401
+        response['WWW-Authenticate'] = CookieJWTAuthentication().authenticate_header(None)
+    result = json_response(response.data, response.status_code)
+    for name, value in response.items():
+        if name != 'Content-Type':
+            result[name] = value
+    return result
+
+
+async def arequest(request, view):
+    """DRF Request с пользователем из aauthenticate() и JSON-рендерером."""
+    authenticator = CookieJWTAuthentication()
+    drf_request = Request(request, authenticators=[authenticator])
+    view.request = drf_request
+    user, token = await aauthenticate(request)
+    # Пользователь уже известен: DRF не должен аутентифицировать синхронно
+    drf_request.user = user or AnonymousUser()
+    drf_request.auth = token
+    drf_request._authenticator = authenticator if token is not None else None
+    drf_request.accepted_renderer = JSONRenderer()
+    drf_request.accepted_media_type = JSONRenderer.media_type
+    view.check_permissions(drf_request)
+    return drf_request
+
+
+def async_list_view(view_class):
+    """GET-вариант списка view_class (ConditionalListMixin + EagerLoadingMixin + ListAPIView)."""
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        instance = view_class(args=args, kwargs=kwargs, format_kwarg=None, headers={})
+        try:
+            return await alist(instance, request)
+        except exceptions.APIException as exc:
+            return error_response(exc, {'view': instance, 'request': getattr(instance, 'request', None)})
+
+    view.view_class = view_class
+    return view
+
+
+async def alist(view, request):
+    drf_request = await arequest(request, view)
+    queryset = view.get_queryset()
+    if drf_request.query_params.get(FullTextSearchFilter.search_param):
+        # search.py один раз проверяет наличие FTS-таблицы запросом к БД
+        queryset = await sync_to_async(view.filter_queryset)(queryset)
+    else:
+        queryset = view.filter_queryset(queryset)
+
+    etag, _ = await view.aget_validators(queryset)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        page = await view.paginator.apaginate_queryset(queryset, drf_request, view=view)
+        serializer = view.get_serializer(page, many=True)
+        response = json_response(view.get_paginated_response(serializer.data).data)
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+    return response
+
+
+task_list_async_view = async_list_view(TaskListCreateAPIView)
+subtask_list_async_view = async_list_view(SubTaskListCreateAPIView)
+my_tasks_async_view = async_list_view(MyTasksListAPIView)
+
+# Имя sync-маршрута -> имя async-варианта в api_urls.py (manage.py benchmark --concurrency)
+ASYNC_VARIANTS = {
+    'task-list-create': 'async-task-list',
+    'my-tasks': 'async-my-tasks',
+    'subtask-list-create': 'async-subtask-list',
+    'task-analytics': 'async-task-analytics',
+}
+
+
+async def task_analytics_async_view(request):
+    """Async-вариант task_analytics_api_view: тот же ответ, запросы через async ORM."""
+    if request.method not in ('GET', 'HEAD'):
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    time_queryset, time_aggregates = analytics_time_query(timezone.now())
+    stored = await counters.aread()
+    time_stats = await time_queryset.aaggregate(**time_aggregates)
+    categories = [row async for row in Category.objects.values_list('id', 'name')]
+    return json_response(build_analytics(stored, time_stats, categories))
+
+
+async def task_events_stream(request):
+    """
+    GET /api/events/ — text/event-stream с изменениями задач и подзадач (см. task_manager/events.py).
+    ?owner=me|<id> — только объекты владельца, ?category=<id> — только задачи категории
+    и их подзадачи. Событие: event: task|subtask, data: {"type", "id", "action", "owner_id"}.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Event stream is served by the ASGI application only.'}, status=501)
+
+    try:
+        user, _ = await aauthenticate(request)
+    except exceptions.AuthenticationFailed:
+        user = None
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    errors = {}
+    owner_id = request.GET.get('owner')
+    if owner_id == 'me':
+        owner_id = user.pk
+    category_id = request.GET.get('category')
+    filters = {}
+    for name, value in (('owner', owner_id), ('category', category_id)):
+        if value is None:
+            continue
+        try:
+            filters[f'{name}_id'] = int(value)
+        except ValueError:
+            errors[name] = 'A valid integer is required.'
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    response = StreamingHttpResponse(
+        events.get_broker().stream(**filters), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx: не буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,131 @@
+"""
+Пакетное создание задач и подзадач: валидация по элементам, INSERT через bulk_create,
+связи с категориями — одним bulk insert в through-таблицу.
+
+bulk_create обходит сигналы, поэтому счётчики аналитики, updated_at родительских
+задач и лента изменений (changes.py) обновляются здесь же.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from . import changes, counters
+from .models import Task, SubTask, Category
+from .serializers import TaskBulkItemSerializer, SubTaskBulkItemSerializer
+
+DUPLICATE_TITLE_ERROR = '{model} with this title already exists.'
+UNKNOWN_TASK_ERROR = 'Task with id {pk} does not exist.'
+
+
+def item_error(index, errors):
+    return {'index': index, 'status': 'error', 'errors': errors}
+
+
+def validate_items(items, serializer_class=TaskBulkItemSerializer):
+    """
+    Возвращает (valid, errors): valid — список (index, validated_data),
+    errors — {index: результат с ошибкой}. Дубликаты title внутри пакета и в БД
+    отсекаются одним запросом.
+    """
+    model = serializer_class.Meta.model
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = item_error(index, serializer.errors)
+
+    titles = [data['title'] for _, data in valid]
+    taken = set(model.objects.filter(title__in=titles).values_list('title', flat=True))
+    accepted = []
+    for index, data in valid:
+        if data['title'] in taken:
+            message = DUPLICATE_TITLE_ERROR.format(model=model._meta.verbose_name)
+            errors[index] = item_error(index, {'title': [message]})
+        else:
+            taken.add(data['title'])
+            accepted.append((index, data))
+    return accepted, errors
+
+
+def insert_tasks(validated, owner=None, batch_size=None):
+    """
+    Вставить уже провалидированные задачи. validated — список validated_data
+    (category_ids внутри). Возвращает список созданных Task в том же порядке.
+    Вызывать внутри transaction.atomic().
+    """
+    tasks = []
+    category_ids = []
+    for data in validated:
+        data = dict(data)
+        category_ids.append(data.pop('category_ids', None) or [])
+        tasks.append(Task(owner=owner, **data))
+    if not tasks:
+        return []
+
+    Task.objects.bulk_create(tasks, batch_size=batch_size)
+    if any(task.pk is None for task in tasks):
+        # MySQL не возвращает pk из bulk_create — title уникален, дочитываем по нему
+        ids = dict(Task.objects.filter(title__in=[t.title for t in tasks]).values_list('title', 'id'))
+        for task in tasks:
+            task.pk = ids[task.title]
+
+    # Несуществующие id категорий игнорируются, как в TaskCreateSerializer.create
+    existing = set(Category.objects.filter(
+        id__in={cid for ids in category_ids for cid in ids}
+    ).values_list('id', flat=True))
+    through = Task.categories.through
+    links = []
+    deltas = Counter()
+    for task, ids in zip(tasks, category_ids):
+        linked = [category_id for category_id in dict.fromkeys(ids) if category_id in existing]
+        links.extend(through(task_id=task.pk, category_id=category_id) for category_id in linked)
+        deltas.update(counters.task_deltas(task.status, linked))
+    through.objects.bulk_create(links, batch_size=batch_size)
+
+    counters.bump(deltas)
+    changes.record(Task, changes.CREATED, [(task.pk, task.owner_id) for task in tasks])
+    return tasks
+
+
+def validate_subtask_items(items):
+    """validate_items для подзадач + проверка, что задачи существуют (один запрос)."""
+    accepted, errors = validate_items(items, SubTaskBulkItemSerializer)
+    task_ids = set(Task.objects.filter(pk__in={data['task'] for _, data in accepted}).values_list('pk', flat=True))
+    existing = []
+    for index, data in accepted:
+        if data['task'] in task_ids:
+            existing.append((index, data))
+        else:
+            errors[index] = item_error(index, {'task': [UNKNOWN_TASK_ERROR.format(pk=data['task'])]})
+    return existing, errors
+
+
+def insert_subtasks(validated, owner=None, batch_size=None):
+    """Вставить провалидированные подзадачи (task — id задачи). Вызывать внутри transaction.atomic()."""
+    subtasks = []
+    for data in validated:
+        data = dict(data)
+        data['task_id'] = data.pop('task')
+        subtasks.append(SubTask(owner=owner, **data))
+    SubTask.objects.bulk_create(subtasks, batch_size=batch_size)
+    if any(subtask.pk is None for subtask in subtasks):
+        ids = dict(SubTask.objects.filter(title__in=[s.title for s in subtasks]).values_list('title', 'id'))
+        for subtask in subtasks:
+            subtask.pk = ids[subtask.title]
+    changes.record(SubTask, changes.CREATED, [(subtask.pk, subtask.owner_id) for subtask in subtasks])
+    Task.objects.filter(pk__in={subtask.task_id for subtask in subtasks}).touch()
+    return subtasks
+
+
+def bulk_create_tasks(items, owner=None):
+    """Полный цикл для API: результат по каждому элементу в исходном порядке."""
+    with transaction.atomic():
+        accepted, errors = validate_items(items)
+        tasks = insert_tasks([data for _, data in accepted], owner=owner)
+
+    results = dict(errors)
+    for (index, _), task in zip(accepted, tasks):
+        results[index] = {'index': index, 'status': 'created', 'id': task.pk}
+    return [results[index] for index in range(len(items))]
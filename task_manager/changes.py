@@ -0,0 +1,174 @@
+"""
+Лента изменений для синхронизации клиентов: GET /api/changes/?since=<cursor>.
+
+Каждое создание, изменение и удаление Task/SubTask/Category пишется в ChangeLog:
+- сигналы (signals.py) — save/delete объектов, каскадное удаление подзадач,
+  мягкое удаление категории через Category.delete() (is_deleted/deleted_at),
+  изменения Task.categories;
+- массовые операции, которые обходят сигналы (bulk.py, bulk-status, admin,
+  CategoryQuerySet.delete), вызывают record() сами.
+
+Запись делается после коммита транзакции (transaction.on_commit): id записи
+выдаётся в порядке коммитов, а откаченные изменения в ленту не попадают.
+Лента отдаёт только записи старше CHANGES_FEED['SETTLE_SECONDS'] и обрывает
+страницу на первой более свежей — параллельная вставка с меньшим id успевает
+закоммититься до того, как курсор клиента уйдёт дальше.
+
+Курсор — непрозрачная строка с id последней отданной записи. Без ?since=
+лента ничего не отдаёт, а возвращает курсор «сейчас»: клиент сначала берёт
+курсор, затем загружает списки, затем опрашивает ленту с этого курсора.
+Если записи за курсором уже удалены командой prune_changes — 410, нужна
+полная пересинхронизация.
+"""
+import base64
+import binascii
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import events, summary
+from .loading import eager_queryset
+from .models import ChangeLog, Task, SubTask, Category
+from .serializers import CategorySerializer, SubTaskChangeSerializer, TaskChangeSerializer
+
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+# kind записи (model_name) -> живые объекты и сериализатор данных в ленте
+FEED_MODELS = {
+    Task._meta.model_name: (Task.objects.all(), TaskChangeSerializer),
+    SubTask._meta.model_name: (SubTask.objects.all(), SubTaskChangeSerializer),
+    # Category.objects без мягко удалённых: для клиентов такая категория — удалённая
+    Category._meta.model_name: (Category.objects.all(), CategorySerializer),
+}
+
+
+class CursorError(ValueError):
+    pass
+
+
+def record(model, action, entries):
+    """
+    Записать изменения объектов model. entries — пары (object_id, owner_id).
+    Вне транзакции запись происходит сразу, внутри — после коммита.
+    """
+    kind = model._meta.model_name
+    entries = [(kind, pk, action, owner_id) for pk, owner_id in entries]
+    if entries:
+        transaction.on_commit(lambda: write(entries))
+
+
+def write(entries):
+    """
+    entries — четвёрки (kind, object_id, action, owner_id). created_at ставится
+    здесь, после коммита: время начала длинной транзакции могло бы оказаться
+    старше горизонта SETTLE_SECONDS, и читатель ленты пропустил бы запись.
+    """
+    now = timezone.now()
+    rows = [
+        ChangeLog(kind=kind, object_id=object_id, action=action, owner_id=owner_id, created_at=now)
+        for kind, object_id, action, owner_id in entries
+    ]
+    ChangeLog.objects.bulk_create(rows, batch_size=1000)
+    # SSE-подписчики этого процесса (events.py)
+    events.publish(rows)
+    # Кэш сводок /api/tasks/my/summary/cached/ (summary.py)
+    summary.invalidate(rows)
+
+
+def record_instance(instance, action):
+    record(type(instance), action, [(instance.pk, getattr(instance, 'owner_id', None))])
+
+
+def record_queryset(queryset, action):
+    """Записать изменения объектов queryset (читается сразу — до UPDATE/DELETE)."""
+    record(queryset.model, action, list(queryset.order_by().values_list('pk', 'owner_id')))
+
+
+# ---------- cursor ----------
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(str(position).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeError, ValueError):
+        raise CursorError('Invalid cursor.')
+    if position < 0:
+        raise CursorError('Invalid cursor.')
+    return position
+
+
+def current_position():
+    return ChangeLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def is_expired(position):
+    """Записи сразу за курсором удалены при очистке журнала."""
+    oldest = ChangeLog.objects.order_by('id').values_list('id', flat=True).first()
+    return oldest is not None and position < oldest - 1
+
+
+# ---------- feed ----------
+def settled_rows(position, limit, kinds=None):
+    """
+    (записи ChangeLog после position, есть ли ещё). Страница обрывается на первой
+    записи свежее SETTLE_SECONDS: транзакция с меньшим id ещё может закоммититься.
+    Общая для ленты и для SSE (events.ChangeLogBackend).
+    """
+    horizon = timezone.now() - timedelta(seconds=settings.CHANGES_FEED['SETTLE_SECONDS'])
+    queryset = ChangeLog.objects.filter(id__gt=position)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    rows = list(queryset.order_by('id').only('id', 'kind', 'object_id', 'action', 'owner_id', 'created_at')[:limit + 1])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    for index, row in enumerate(rows):
+        if row.created_at > horizon:
+            return rows[:index], True
+    return rows, has_more
+
+
+def read_changes(position, limit, kinds=None):
+    """
+    Страница ленты после position: (changes, last_position, has_more).
+    Несколько записей об одном объекте схлопываются в последнюю; данные объекта —
+    текущие, по одному запросу на тип. Объект, которого уже нет, отдаётся как удалённый.
+    """
+    rows, has_more = settled_rows(position, limit, kinds)
+    if not rows:
+        return [], position, has_more
+
+    latest = {}
+    for row in rows:
+        key = (row.kind, row.object_id)
+        previous = latest.pop(key, None)
+        if previous is not None and previous.action == CREATED and row.action == UPDATED:
+            # Клиент ещё не видел объект: для него это создание
+            row.action = CREATED
+        latest[key] = row
+
+    data = {}
+    for kind, (queryset, serializer_class) in FEED_MODELS.items():
+        ids = [object_id for (row_kind, object_id), row in latest.items()
+               if row_kind == kind and row.action != DELETED]
+        if ids:
+            objects = eager_queryset(queryset.filter(pk__in=ids), serializer_class)
+            data.update(((kind, item['id']), item) for item in serializer_class(objects, many=True).data)
+
+    changes = []
+    for (kind, object_id), row in latest.items():
+        item = data.get((kind, object_id))
+        changes.append({
+            'type': kind,
+            'id': object_id,
+            'action': row.action if item is not None else DELETED,
+            'data': item,
+        })
+    return changes, rows[-1].id, has_more
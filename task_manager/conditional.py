@@ -0,0 +1,84 @@
+"""
+Conditional GET для API: ETag/Last-Modified и 304 Not Modified без сериализации.
+
+Валидатор считается одним агрегатом по отфильтрованному queryset вьюхи:
+MAX(updated_at) и COUNT(*) (COUNT ловит удаления, которых MAX не видит).
+Сюда же добавляется MAX(updated_at) моделей из conditional_dependencies —
+например категорий, которые встроены в представление задачи.
+
+Изменения подзадач и связей с категориями обновляют updated_at задачи
+(signals.py, bulk.py), поэтому ETag задачи меняется вместе с её ответом.
+
+Last-Modified отдаётся только для одного объекта: в списке удаление не двигает
+MAX(updated_at), и клиент, проверяющий только If-Modified-Since, получил бы 304.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """Валидаторы и 304; list/retrieve — в ConditionalListMixin и ConditionalRetrieveMixin."""
+    conditional_dependencies = ()
+
+    def get_validators(self, queryset):
+        """(etag, last_modified) из одного агрегата; last_modified — None для пустой выборки."""
+        state = queryset.order_by().aggregate(last=Max('updated_at'), count=Count('pk'))
+        dependencies = [
+            model._base_manager.aggregate(last=Max('updated_at'))['last']
+            for model in self.conditional_dependencies
+        ]
+        return self.make_validators(state, dependencies)
+
+    async def aget_validators(self, queryset):
+        """get_validators для async-вьюх (async_views.py)."""
+        state = await queryset.order_by().aaggregate(last=Max('updated_at'), count=Count('pk'))
+        dependencies = [
+            (await model._base_manager.aaggregate(last=Max('updated_at')))['last']
+            for model in self.conditional_dependencies
+        ]
+        return self.make_validators(state, dependencies)
+
+    def make_validators(self, state, dependencies):
+        parts = [state['count'], state['last'], *dependencies]
+        # Один URL может отдавать разное: формат (JSON/browsable API) и пользователь (my tasks)
+        parts.extend([
+            self.request.get_full_path(),
+            getattr(self.request.accepted_renderer, 'format', None),
+            self.request.user.pk,
+        ])
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'W/{quote_etag(digest)}', state['last']
+
+    def conditional_response(self, request, etag, last_modified, handler, *args, **kwargs):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, _ = self.get_validators(queryset)
+        return self.conditional_response(request, etag, None, super().list, *args, **kwargs)
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        etag, last_modified = self.get_validators(queryset)
+        if last_modified is None:
+            # Объекта нет — обычный путь с 404
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(request, etag, last_modified, super().retrieve, *args, **kwargs)
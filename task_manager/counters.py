@@ -0,0 +1,85 @@
+"""
+Инкрементальные счётчики задач для аналитики.
+
+Сигналы (task_manager/signals.py) вызывают bump() при создании, изменении
+статуса и удалении Task и при изменении связей Task.categories. Массовые
+операции, которые обходят сигналы (bulk_create, QuerySet.update), должны
+вызывать bump() сами.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Task, TaskCounter, STATUS_CHOICES
+
+TOTAL_KEY = 'total'
+
+
+def status_key(status):
+    return f'status:{status}'
+
+
+def category_key(category_id):
+    return f'category:{category_id}'
+
+
+def task_deltas(status, category_ids=(), sign=1):
+    """Изменения счётчиков при появлении (sign=1) или исчезновении (sign=-1) задачи."""
+    deltas = Counter({TOTAL_KEY: sign, status_key(status): sign})
+    for category_id in category_ids:
+        deltas[category_key(category_id)] += sign
+    return deltas
+
+
+def bump(deltas):
+    """Атомарно прибавить дельты к счётчикам: UPDATE ... SET value = value + d."""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        updated = TaskCounter.objects.filter(key=key).update(value=F('value') + delta)
+        if not updated:
+            TaskCounter.objects.get_or_create(key=key)
+            TaskCounter.objects.filter(key=key).update(value=F('value') + delta)
+
+
+def read():
+    """Все счётчики одним запросом."""
+    return dict(TaskCounter.objects.values_list('key', 'value'))
+
+
+async def aread():
+    # async for, а не aiterator(): в Django 5.2 aiterator() для values_list выполняет SQL в event loop
+    return {key: value async for key, value in TaskCounter.objects.values_list('key', 'value')}
+
+
+def compute():
+    """Эталонные значения, посчитанные по самим таблицам."""
+    values = {TOTAL_KEY: Task.objects.count()}
+    for status, _ in STATUS_CHOICES:
+        values[status_key(status)] = 0
+    for row in Task.objects.order_by().values('status').annotate(count=Count('id')):
+        values[status_key(row['status'])] = row['count']
+    through = Task.categories.through
+    for row in through.objects.order_by().values('category_id').annotate(count=Count('id')):
+        values[category_key(row['category_id'])] = row['count']
+    return values
+
+
+def diff(stored, expected):
+    """Ключи, где сохранённое значение расходится с эталоном: {key: (stored, expected)}."""
+    keys = set(stored) | set(expected)
+    return {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in sorted(keys)
+        if stored.get(key, 0) != expected.get(key, 0)
+    }
+
+
+@transaction.atomic
+def rebuild(values=None):
+    if values is None:
+        values = compute()
+    TaskCounter.objects.all().delete()
+    TaskCounter.objects.bulk_create([TaskCounter(key=k, value=v) for k, v in values.items()])
+    return values
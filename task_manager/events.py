@@ -0,0 +1,285 @@
+"""
+Push-уведомления об изменениях задач и подзадач для SSE-потока /api/events/
+(async_views.task_events_stream, только под ASGI — core/asgi.py).
+
+Источник событий — записи ChangeLog (changes.py). Broker в каждом процессе
+держит подписки: у каждой свой asyncio.Queue ограниченного размера
+(TASK_EVENTS['BUFFER_SIZE']). Медленный клиент не копит память: при
+переполнении новые события для него отбрасываются, а после разбора буфера
+поток отправляет event: overflow и закрывается — клиент догоняет пропущенное
+через /api/changes/ и переподключается.
+
+Откуда брокер получает события, решает backend (TASK_EVENTS['BACKEND']):
+- LocalBackend — события из того же процесса (после коммита транзакции).
+  Достаточно для одного воркера и для тестов.
+- ChangeLogBackend — каждый воркер опрашивает таблицу ChangeLog, поэтому
+  видит изменения из всех процессов без отдельного брокера сообщений.
+Свой backend (например Redis pub/sub) — класс с тем же интерфейсом:
+__init__(broker, options), publish(rows) из синхронного кода, start(loop), stop().
+
+Лента /api/changes/ остаётся источником истины: поток — только уведомления.
+"""
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from .models import SubTask, Task
+
+EVENT_KINDS = (Task._meta.model_name, SubTask._meta.model_name)
+DELETED = 'deleted'
+
+logger = logging.getLogger('task_manager.events')
+
+
+def event_from_row(row):
+    return {
+        'type': row.kind,
+        'id': row.object_id,
+        'action': row.action,
+        'owner_id': row.owner_id,
+    }
+
+
+def attach_categories(events):
+    """
+    category_ids задачи (для подзадачи — её задачи) двумя запросами на пачку.
+    У удалённых объектов связей уже нет: category_ids = None, фильтр по категории их пропускает.
+    """
+    subtask_ids = [e['id'] for e in events if e['type'] == SubTask._meta.model_name and e['action'] != DELETED]
+    parents = dict(SubTask.objects.filter(pk__in=subtask_ids).values_list('pk', 'task_id')) if subtask_ids else {}
+    task_ids = {e['id'] for e in events if e['type'] == Task._meta.model_name and e['action'] != DELETED}
+    task_ids.update(parents.values())
+
+    categories = {}
+    if task_ids:
+        through = Task.categories.through
+        for task_id, category_id in through.objects.filter(task_id__in=task_ids).values_list('task_id', 'category_id'):
+            categories.setdefault(task_id, set()).add(category_id)
+
+    for event in events:
+        if event['action'] == DELETED:
+            event['category_ids'] = None
+            continue
+        task_id = event['id'] if event['type'] == Task._meta.model_name else parents.get(event['id'])
+        event['category_ids'] = categories.get(task_id, set()) if task_id is not None else None
+    return events
+
+
+def format_event(event):
+    data = {key: value for key, value in event.items() if key != 'category_ids'}
+    return f'event: {event["type"]}\ndata: {json.dumps(data)}\n\n'
+
+
+class Subscription:
+    def __init__(self, owner_id=None, category_id=None, buffer_size=100):
+        self.owner_id = owner_id
+        self.category_id = category_id
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+    def matches(self, event):
+        if self.owner_id is not None and event['owner_id'] != self.owner_id:
+            return False
+        if self.category_id is not None:
+            category_ids = event.get('category_ids')
+            if category_ids is not None and self.category_id not in category_ids:
+                return False
+        return True
+
+    def offer(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Broker:
+    """
+    Подписки одного процесса. Все методы, кроме publish(), — в потоке event loop.
+    Backend запускается с первой подпиской и останавливается с последней.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.subscriptions = set()
+        # Читается из потоков синхронного кода: нужно ли считать category_ids
+        self.category_subscribers = 0
+        self.loop = None
+        self.backend = import_string(options['BACKEND'])(self, options)
+
+    def subscribe(self, owner_id=None, category_id=None):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.backend.stop()
+            self.loop = loop
+        self.backend.start(loop)
+        subscription = Subscription(owner_id, category_id, self.options['BUFFER_SIZE'])
+        self.subscriptions.add(subscription)
+        if category_id is not None:
+            self.category_subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+            if subscription.category_id is not None:
+                self.category_subscribers -= 1
+            if not self.subscriptions:
+                self.backend.stop()
+
+    def dispatch(self, events):
+        for event in events:
+            for subscription in list(self.subscriptions):
+                if subscription.matches(event):
+                    subscription.offer(event)
+
+    def dispatch_threadsafe(self, events):
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.dispatch, events)
+
+    def publish(self, rows):
+        """Вызывается из changes.record() после коммита (синхронный код, любой поток)."""
+        self.backend.publish(rows)
+
+    async def stream(self, owner_id=None, category_id=None):
+        """Тело SSE-ответа: события подписки, комментарий-heartbeat при тишине."""
+        subscription = self.subscribe(owner_id, category_id)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), self.options['HEARTBEAT_SECONDS'])
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                yield format_event(event)
+                if subscription.overflowed and subscription.queue.empty():
+                    yield 'event: overflow\ndata: {}\n\n'
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+
+class LocalBackend:
+    """События только своего процесса; без подписчиков ничего не делает."""
+
+    def __init__(self, broker, options):
+        self.broker = broker
+
+    def publish(self, rows):
+        if not self.broker.subscriptions:
+            return
+        events = [event_from_row(row) for row in rows if row.kind in EVENT_KINDS]
+        if not events:
+            return
+        if self.broker.category_subscribers:
+            attach_categories(events)
+        self.broker.dispatch_threadsafe(events)
+
+    def start(self, loop):
+        pass
+
+    def stop(self):
+        pass
+
+
+# Пауза между неудачными опросами растёт вдвое, но не дольше
+MAX_BACKOFF_SECONDS = 30
+
+
+class ChangeLogBackend:
+    """
+    Для нескольких воркеров: опрос ChangeLog раз в TASK_EVENTS['POLL_SECONDS'],
+    пока в процессе есть подписчики. publish() не нужен — записи уже в общей БД.
+    Записи читаются через changes.settled_rows(), поэтому события приходят с
+    задержкой CHANGES_FEED['SETTLE_SECONDS'].
+    """
+
+    def __init__(self, broker, options):
+        self.broker = broker
+        self.interval = options['POLL_SECONDS']
+        self.task = None
+
+    def publish(self, rows):
+        pass
+
+    def start(self, loop):
+        if self.task is None:
+            self.task = loop.create_task(self.run())
+            self.task.add_done_callback(self.finished)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def finished(self, task):
+        # Опрос завершился сам — следующая подписка запустит новый
+        if self.task is task:
+            self.task = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Change log poller stopped', exc_info=task.exception())
+
+    async def run(self):
+        position = None
+        failures = 0
+        while True:
+            # Ошибка БД (обрыв соединения, таймаут блокировки) не должна останавливать поток событий
+            await asyncio.sleep(min(self.interval * 2 ** failures, MAX_BACKOFF_SECONDS))
+            try:
+                events, position = await sync_to_async(self.poll, thread_sensitive=False)(position)
+            except Exception:
+                failures += 1
+                logger.exception('Change log poll failed (attempt %d)', failures)
+                continue
+            failures = 0
+            if events:
+                self.broker.dispatch(events)
+
+    def poll(self, position):
+        # Поток из пула: закрыть соединение, сломанное прошлой ошибкой или устаревшее
+        close_old_connections()
+        if position is None:
+            return [], self.last_position()
+        return self.fetch(position)
+
+    @staticmethod
+    def last_position():
+        from . import changes
+
+        return changes.current_position()
+
+    def fetch(self, position):
+        # Тот же горизонт, что у /api/changes/: запись с меньшим id, закоммиченная позже, не пропадёт
+        from . import changes
+
+        rows, _ = changes.settled_rows(position, 1000, kinds=EVENT_KINDS)
+        if not rows:
+            return [], position
+        events = [event_from_row(row) for row in rows]
+        if events and self.broker.category_subscribers:
+            attach_categories(events)
+        return events, rows[-1].id
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = Broker(settings.TASK_EVENTS)
+    return _broker
+
+
+def publish(rows):
+    if _broker is not None:
+        _broker.publish(rows)
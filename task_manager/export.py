@@ -0,0 +1,102 @@
+"""
+Потоковая выгрузка задач с подзадачами в NDJSON/CSV.
+
+Задачи читаются пачками по первичному ключу (WHERE id > last ORDER BY id LIMIT n),
+категории и подзадачи подгружаются одним запросом на пачку. Так память не растёт
+с размером выгрузки, а курсор БД не держится открытым, пока медленный клиент
+скачивает файл.
+
+Под ASGI StreamingHttpResponse с обычным генератором сначала собирает его
+целиком (sync_to_async(list)), поэтому view отдаёт astream(): каждая пачка
+читается в потоке через sync_to_async и уходит клиенту сразу.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import Category, SubTask
+
+CSV_COLUMNS = ['id', 'title', 'description', 'status', 'deadline', 'created_at', 'owner', 'categories', 'subtasks']
+
+
+def iter_task_chunks(queryset, chunk_size):
+    queryset = queryset.select_related('owner').order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        prefetch_related_objects(
+            chunk,
+            Prefetch('categories', queryset=Category.objects.only('id', 'name')),
+            Prefetch('subtasks', queryset=SubTask.objects.only(
+                'id', 'task_id', 'title', 'status', 'deadline', 'created_at',
+            ).order_by('-created_at')),
+        )
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def task_row(task):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'status': task.status,
+        'deadline': task.deadline,
+        'created_at': task.created_at,
+        'owner': task.owner.username if task.owner else None,
+        'categories': [category.name for category in task.categories.all()],
+        'subtasks': [
+            {
+                'id': subtask.id,
+                'title': subtask.title,
+                'status': subtask.status,
+                'deadline': subtask.deadline,
+                'created_at': subtask.created_at,
+            }
+            for subtask in task.subtasks.all()
+        ],
+    }
+
+
+def stream_ndjson(queryset, chunk_size):
+    for chunk in iter_task_chunks(queryset, chunk_size):
+        yield ''.join(json.dumps(task_row(task), cls=DjangoJSONEncoder) + '\n' for task in chunk)
+
+
+def stream_csv(queryset, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    for chunk in iter_task_chunks(queryset, chunk_size):
+        for task in chunk:
+            row = task_row(task)
+            row['deadline'] = row['deadline'].isoformat()
+            row['created_at'] = row['created_at'].isoformat()
+            row['categories'] = '|'.join(row['categories'])
+            row['subtasks'] = json.dumps(row['subtasks'], cls=DjangoJSONEncoder)
+            writer.writerow([row[column] for column in CSV_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+async def astream(stream):
+    """Асинхронный итератор по частям stream_ndjson()/stream_csv(): запросы — в потоке, по пачке."""
+    iterator = iter(stream)
+    done = object()
+    while True:
+        part = await sync_to_async(next)(iterator, done)
+        if part is done:
+            return
+        yield part
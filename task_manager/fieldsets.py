@@ -0,0 +1,70 @@
+"""
+Выборочные поля в ответах API: ?fields=id,title,status и ?expand=subtasks,categories.
+
+- Без обоих параметров сериализатор отдаёт полное представление, как раньше.
+- ?fields= — только перечисленные поля.
+- Связи из Meta.expandable_fields, как только клиент передал fields или expand,
+  включаются только явно: через ?expand= или перечислением в ?fields=.
+
+Queryset под запрошенные поля строит вьюха (loading.EagerLoadingMixin): колонки
+через only(), связи и аннотации — только для полей, которые попадут в ответ.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_list(value):
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def requested_fields(serializer_class, request, available):
+    """
+    Имена полей, которые нужно отдать, или None, если клиент ничего не выбирал.
+    Неизвестные имена — 400.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = parse_list(request.query_params.get(FIELDS_PARAM))
+    expand = parse_list(request.query_params.get(EXPAND_PARAM))
+    if fields is None and expand is None:
+        return None
+
+    expandable = set(getattr(serializer_class.Meta, 'expandable_fields', ()))
+    errors = {}
+    unknown = [name for name in fields or () if name not in available]
+    if unknown:
+        errors[FIELDS_PARAM] = f'Unknown fields: {", ".join(unknown)}.'
+    unknown = [name for name in expand or () if name not in expandable]
+    if unknown:
+        errors[EXPAND_PARAM] = f'Cannot expand: {", ".join(unknown)}.'
+    if errors:
+        raise ValidationError(errors)
+
+    selected = set(fields) if fields is not None else set(available) - expandable
+    return selected | set(expand or ())
+
+
+class DynamicFieldsMixin:
+    """
+    Для ModelSerializer: оставляет только запрошенные поля. Действует на сериализатор
+    верхнего уровня вьюхи (и его child при many=True); вложенные отдаются целиком.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+        names = requested_fields(type(self), self.context.get('request'), fields)
+        if names is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in names}
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, ListSerializer) and parent.parent is None)
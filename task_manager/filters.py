@@ -0,0 +1,105 @@
+"""
+Фильтры задач и подзадач — общие для API (FilterBackend, filterset_class вьюх)
+и HTML-страниц (views.tasks, views.task_detail).
+
+Каждый фильтр — условие по самому столбцу, без функций над ним, поэтому
+запрос использует составные индексы (status, deadline), (task, status),
+(owner, -created_at):
+- status — точное совпадение;
+- deadline, deadline__gte, deadline__lte — момент времени (как раньше в API);
+- created_from/created_to, deadline_from/deadline_to — даты в текущем
+  часовом поясе как полуоткрытый диапазон: >= начала первого дня и
+  < начала дня после последнего (вместо __date, который оборачивает столбец).
+
+Ввод проверяется один раз формой FilterSet: API отвечает 400 (FilterBackend),
+HTML-страницы игнорируют неверные поля.
+
+FK фильтруется по id без проверки, что объект существует: ModelChoiceFilter
+делал на это отдельный запрос, а в async-вьюхах (async_views.py) синхронный
+запрос при валидации фильтров недопустим. Несуществующий id — пустой список.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import models
+from django.utils import timezone
+from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+
+from .models import STATUS_CHOICES, SubTask, Task
+
+
+def day_start(day):
+    """Начало дня day в текущем часовом поясе."""
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+class DayFilter(filters.DateFilter):
+    """Дата -> граница полуоткрытого диапазона по DateTimeField: >= начала дня или < начала следующего."""
+
+    def __init__(self, *args, end=False, **kwargs):
+        self.end = end
+        kwargs['lookup_expr'] = 'lt' if end else 'gte'
+        super().__init__(*args, **kwargs)
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if self.end:
+            value += timedelta(days=1)
+        return super().filter(qs, day_start(value))
+
+
+class FilterSet(filters.FilterSet):
+    FILTER_DEFAULTS = {
+        **filters.FilterSet.FILTER_DEFAULTS,
+        models.ForeignKey: {'filter_class': filters.NumberFilter},
+    }
+
+
+class TaskFilterSet(FilterSet):
+    status = filters.ChoiceFilter(choices=STATUS_CHOICES)
+    category = filters.NumberFilter(field_name='categories')
+    created_from = DayFilter(field_name='created_at')
+    created_to = DayFilter(field_name='created_at', end=True)
+    deadline_from = DayFilter(field_name='deadline')
+    deadline_to = DayFilter(field_name='deadline', end=True)
+
+    class Meta:
+        model = Task
+        fields = {
+            'deadline': ['exact', 'gte', 'lte'],
+        }
+
+
+class SubTaskFilterSet(FilterSet):
+    status = filters.ChoiceFilter(choices=STATUS_CHOICES)
+    created_from = DayFilter(field_name='created_at')
+    created_to = DayFilter(field_name='created_at', end=True)
+    deadline_from = DayFilter(field_name='deadline')
+    deadline_to = DayFilter(field_name='deadline', end=True)
+
+    class Meta:
+        model = SubTask
+        fields = {
+            'task': ['exact'],
+            'deadline': ['exact', 'gte', 'lte'],
+        }
+
+
+def form_filter_data(params, prefix=''):
+    """
+    Параметры HTML-фильтров (status, category, date_field, date_from, date_to;
+    с префиксом — subtask_status и т.д.) -> данные для TaskFilterSet/SubTaskFilterSet.
+    """
+    date_field = 'deadline' if params.get(f'{prefix}date_field') == 'deadline' else 'created'
+    data = {
+        'status': params.get(f'{prefix}status'),
+        'category': params.get(f'{prefix}category'),
+        f'{date_field}_from': params.get(f'{prefix}date_from'),
+        f'{date_field}_to': params.get(f'{prefix}date_to'),
+    }
+    return {name: value for name, value in data.items() if value}
+
+
+class FilterBackend(filters.DjangoFilterBackend):
+    filterset_base = FilterSet
@@ -0,0 +1,173 @@
+"""
+Контракт «сериализатор объявляет — вьюха загружает».
+
+Сериализатор перечисляет в Meta.eager_loading, как загрузить поля, которые ходят
+в связи или аннотации:
+
+    eager_loading = {
+        'owner': SelectRelated('owner', only=['username']),
+        'categories': PrefetchRelated('categories', CategorySerializer),
+        'subtasks_count': Annotate('with_subtask_count'),
+    }
+
+EagerLoadingMixin на generic-вьюхе применяет к queryset select_related, Prefetch
+с queryset вложенного сериализателя (...only(...)) и аннотации — только для полей,
+которые попадут в ответ (с учётом ?fields=/?expand=, см. fieldsets.py). Колонки
+модели ограничиваются only(); если какое-то поле нельзя сопоставить с колонками
+(SerializerMethodField без декларации), only() не применяется, чтобы не получить
+по запросу на каждый объект за отложенными полями.
+
+Проверить, что число запросов не растёт с числом строк: testing.assert_constant_queries.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.permissions import SAFE_METHODS
+
+from .fieldsets import DynamicFieldsMixin, parse_list, requested_fields
+
+
+class SelectRelated:
+    """FK/OneToOne одним JOIN; only — нужные колонки связанной модели."""
+
+    def __init__(self, field, only=()):
+        self.field = field
+        self.only = list(only)
+
+    def apply(self, queryset, request):
+        return queryset.select_related(self.field)
+
+    def columns(self, model):
+        return [f'{self.field}__{column}' for column in self.only] or [self.field]
+
+
+class PrefetchRelated:
+    """
+    M2M или обратный FK одним запросом. queryset вложенного объекта строится
+    по декларациям serializer (рекурсивно). limit — число или функция(request):
+    не больше limit объектов на родителя (Django выполняет через ROW_NUMBER()).
+    """
+
+    def __init__(self, lookup, serializer=None, to_attr=None, order_by=(), limit=None):
+        self.lookup = lookup
+        self.serializer = serializer
+        self.to_attr = to_attr
+        self.order_by = list(order_by)
+        self.limit = limit
+
+    def apply(self, queryset, request):
+        field = queryset.model._meta.get_field(self.lookup)
+        inner = field.related_model._default_manager.all()
+        if self.serializer is not None:
+            required = [field.field.name] if field.one_to_many else []
+            inner = eager_queryset(inner, self.serializer, extra_columns=required)
+        if self.order_by:
+            inner = inner.order_by(*self.order_by)
+        limit = self.limit(request) if callable(self.limit) else self.limit
+        if limit is not None:
+            inner = inner[:limit]
+        return queryset.prefetch_related(Prefetch(self.lookup, queryset=inner, to_attr=self.to_attr))
+
+    def columns(self, model):
+        return []
+
+
+class Annotate:
+    """Аннотация методом QuerySet модели (например TaskQuerySet.with_subtask_count)."""
+
+    def __init__(self, method, columns=()):
+        self.method = method
+        self._columns = list(columns)
+
+    def apply(self, queryset, request):
+        return getattr(queryset, self.method)()
+
+    def columns(self, model):
+        return self._columns
+
+
+class Columns:
+    """Для SerializerMethodField: какие колонки модели читает метод."""
+
+    def __init__(self, *columns):
+        self._columns = list(columns)
+
+    def apply(self, queryset, request):
+        return queryset
+
+    def columns(self, model):
+        return self._columns
+
+
+def eager_queryset(queryset, serializer_class, fields=None, request=None, extra_columns=()):
+    """
+    Применить Meta.eager_loading сериализатора и only() по колонкам его полей.
+    fields — имена полей ответа или None (все читаемые поля).
+    """
+    model = queryset.model
+    loaders = getattr(serializer_class.Meta, 'eager_loading', {})
+    columns = {model._meta.pk.name, *extra_columns}
+    restrict = True
+
+    for name, field in serializer_class().fields.items():
+        if field.write_only or (fields is not None and name not in fields):
+            continue
+        loader = loaders.get(name)
+        if loader is not None:
+            queryset = loader.apply(queryset, request)
+            columns.update(loader.columns(model))
+            continue
+        path = field.source.split('.') if field.source != '*' else []
+        try:
+            model_field = model._meta.get_field(path[0]) if path else None
+        except FieldDoesNotExist:
+            model_field = None
+        if model_field is None or model_field.many_to_many or model_field.one_to_many or len(path) > 1:
+            # Не объявлено, откуда поле берёт данные: колонки не ограничиваем
+            restrict = False
+            continue
+        columns.add(model_field.name)
+
+    return queryset.only(*columns) if restrict else queryset
+
+
+class EagerLoadingMixin:
+    """
+    Для generic-вьюх: queryset под сериализатор вьюхи и запрошенные поля.
+    Только для чтения: запись работает с полными объектами.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if self.request.method not in SAFE_METHODS or not hasattr(serializer_class, 'Meta'):
+            return queryset
+        # Связи и аннотации объявляет сериализатор: базовые JOIN-ы вьюхи не нужны
+        queryset = queryset.select_related(None).prefetch_related(None)
+        return eager_queryset(
+            queryset, serializer_class, self.get_requested_fields(), self.request,
+            extra_columns=self.ordering_columns(queryset.model),
+        )
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            serializer_class = self.get_serializer_class()
+            if issubclass(serializer_class, DynamicFieldsMixin):
+                available = serializer_class().fields
+                self._requested_fields = requested_fields(serializer_class, self.request, available)
+            else:
+                self._requested_fields = None
+        return self._requested_fields
+
+    def ordering_columns(self, model):
+        """Колонки сортировки (модели, вьюхи, пагинатора, ?ordering=) — курсору они нужны всегда."""
+        names = list(model._meta.ordering)
+        for ordering in (
+            getattr(self, 'ordering', None),
+            getattr(self.paginator, 'ordering', None),
+            parse_list(self.request.query_params.get('ordering')),
+        ):
+            if isinstance(ordering, str):
+                ordering = [ordering]
+            names.extend(ordering or ())
+        concrete = {field.name for field in model._meta.concrete_fields}
+        return {name.lstrip('-') for name in names} & concrete
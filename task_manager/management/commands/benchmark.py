@@ -0,0 +1,225 @@
+import asyncio
+import json
+import re
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from task_manager.async_views import ASYNC_VARIANTS
+from task_manager.models import Task, SubTask, Category
+
+User = get_user_model()
+
+# Какие модули URL бенчмаркаем и как их найти в корневом urlconf
+TARGET_URLCONFS = ['task_manager.api_urls', 'task_manager.urls']
+
+# Подстановка id в параметры маршрутов
+PARAM_MODELS = {
+    'task_id': Task,
+    'subtask_id': SubTask,
+    'category_id': Category,
+}
+PK_PREFIX_MODELS = {
+    'subtasks': SubTask,
+    'tasks': Task,
+    'categories': Category,
+}
+
+ROUTE_PARAM_RE = re.compile(r'<(?:\w+:)?(\w+)>')
+REGEX_PARAM_RE = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def urlconf_module_name(resolver):
+    return getattr(resolver.urlconf_name, '__name__', resolver.urlconf_name)
+
+
+def percentile(values, pct):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет GET по всем маршрутам task_manager/api_urls.py и task_manager/urls.py '
+        'через тестовый клиент и печатает p50/p95/p99, число SQL-запросов и размер ответа. '
+        'С --concurrency дополнительно сравнивает пропускную способность sync-вьюх и их '
+        'async-вариантов (/api/async/...) под ASGI.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--username', default=None,
+                            help='Выполнять запросы от имени пользователя (JWT в заголовке).')
+        parser.add_argument('--match', default=None,
+                            help='Бенчмаркать только маршруты, содержащие подстроку.')
+        parser.add_argument('--json', dest='json_path', default=None,
+                            help='Сохранить результаты в JSON-файл.')
+        parser.add_argument('--concurrency', type=int, default=0,
+                            help='Параллельных запросов для сравнения sync/async (0 — не сравнивать).')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на маршрут при сравнении sync/async.')
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["username"]}" does not exist.')
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {AccessToken.for_user(user)}'
+
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        client = Client(SERVER_NAME=host, **headers)
+
+        routes = self.collect_routes()
+        if options['match']:
+            routes = [r for r in routes if options['match'] in r]
+
+        results = []
+        self.stdout.write(f'{"route":<45} {"status":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+                          f'{"queries":>8} {"bytes":>9}')
+        for url in routes:
+            result = self.run_route(client, url, options['iterations'], options['warmup'])
+            results.append(result)
+            self.stdout.write(
+                f'{url:<45} {result["status"]:>6} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+                f'{result["p99_ms"]:>8.2f} {result["queries"]:>8} {result["bytes"]:>9}'
+            )
+
+        if options['concurrency'] > 0:
+            throughput = self.compare_throughput(headers, options['concurrency'], options['requests'])
+            results = {'latency': results, 'throughput': throughput}
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    # ---------- routes ----------
+    def collect_routes(self):
+        routes = []
+        for prefix, resolver in self.find_mounts(get_resolver(), ''):
+            # Вложенные include в task_manager/urls.py (api/, admin/) уже покрыты или не нужны
+            follow_nested = urlconf_module_name(resolver) == 'task_manager.api_urls'
+            for route in self.walk(resolver, prefix, follow_nested):
+                url = self.fill_params(route)
+                if url and url not in routes:
+                    routes.append(url)
+        return routes
+
+    def find_mounts(self, resolver, prefix):
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLResolver):
+                if urlconf_module_name(pattern) in TARGET_URLCONFS:
+                    yield '/' + prefix + str(pattern.pattern), pattern
+
+    def walk(self, resolver, prefix, follow_nested):
+        for pattern in resolver.url_patterns:
+            route = str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                if follow_nested:
+                    yield from self.walk(pattern, prefix + route.lstrip('^'), follow_nested)
+            elif isinstance(pattern, URLPattern):
+                if 'format' in route:
+                    continue
+                yield prefix + route.lstrip('^').rstrip('$')
+
+    def fill_params(self, route):
+        params = REGEX_PARAM_RE.findall(route) or ROUTE_PARAM_RE.findall(route)
+        for name in params:
+            model = PARAM_MODELS.get(name)
+            if model is None:
+                segments = [s for s in route.split('/') if s]
+                model = next((PK_PREFIX_MODELS[s] for s in segments if s in PK_PREFIX_MODELS), None)
+            pk = model.objects.order_by('pk').values_list('pk', flat=True).first() if model else None
+            if pk is None:
+                return None
+            route = REGEX_PARAM_RE.sub(str(pk), route, count=1)
+            route = ROUTE_PARAM_RE.sub(str(pk), route, count=1)
+        return route
+
+    # ---------- measurement ----------
+    def run_route(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = client.get(url)
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            timings.append((time.perf_counter() - start) * 1000)
+
+        # X-Query-Count ставит core.middleware.QueryCountMiddleware; без неё считаем отдельным прогоном
+        queries = response.get('X-Query-Count')
+        if queries is None:
+            with CaptureQueriesContext(connection) as ctx:
+                client.get(url)
+            queries = len(ctx.captured_queries)
+
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'queries': int(queries),
+            'bytes': len(content),
+        }
+
+    # ---------- sync vs async ----------
+    def compare_throughput(self, headers, concurrency, total):
+        """Оба варианта — через ASGI-обработчик (AsyncClient): sync-вьюха уходит в поток на весь запрос."""
+        asgi_headers = {}
+        if 'HTTP_AUTHORIZATION' in headers:
+            asgi_headers['Authorization'] = headers['HTTP_AUTHORIZATION']
+
+        self.stdout.write('')
+        self.stdout.write(f'Throughput under ASGI, concurrency={concurrency}, {total} requests per route')
+        self.stdout.write(f'{"route":<30} {"sync req/s":>11} {"async req/s":>12} {"async/sync":>11}')
+        results = []
+        for sync_name, async_name in ASYNC_VARIANTS.items():
+            sync_url = reverse(f'task_manager_api:{sync_name}')
+            async_url = reverse(f'task_manager_api:{async_name}')
+            # AsyncClient всегда шлёт Host: testserver, его нельзя переопределить
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                sync_rps, sync_status = asyncio.run(self.run_concurrent(sync_url, asgi_headers, concurrency, total))
+                async_rps, async_status = asyncio.run(self.run_concurrent(async_url, asgi_headers, concurrency, total))
+            results.append({
+                'url': sync_url, 'async_url': async_url,
+                'sync_rps': sync_rps, 'async_rps': async_rps,
+                'sync_status': sync_status, 'async_status': async_status,
+            })
+            self.stdout.write(
+                f'{sync_url:<30} {sync_rps:>11.1f} {async_rps:>12.1f} {async_rps / max(sync_rps, 1e-9):>10.2f}x'
+                + ('' if sync_status == async_status == 200 else f'  (status {sync_status}/{async_status})')
+            )
+        return results
+
+    @staticmethod
+    async def run_concurrent(url, headers, concurrency, total):
+        """(запросов в секунду, статус последнего ответа) при concurrency одновременных клиентах."""
+        client = AsyncClient()
+        remaining = total
+        status = None
+
+        async def worker():
+            nonlocal remaining, status
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get(url, headers=headers)
+                status = response.status_code
+
+        await client.get(url, headers=headers)  # прогрев
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start), status
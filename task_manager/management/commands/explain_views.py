@@ -0,0 +1,197 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from django.urls import URLPattern, URLResolver
+from django.utils import timezone
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from task_manager import api_urls
+
+User = get_user_model()
+
+# Признаки полного скана таблицы в выводе EXPLAIN для разных БД
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)\s*$', re.MULTILINE),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'mysql': re.compile(r'"table_name": "(\w+)",\s*"access_type": "ALL"'),
+}
+EXPLAIN_FORMAT = {
+    'mysql': 'json',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для querysets всех list-вьюх из task_manager/api_urls.py '
+        '(без фильтров, с фильтрами каждого поля из filterset_class или filterset_fields '
+        'и со всеми сразу) '
+        'и сообщает о полных сканах таблиц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ignore-table', action='append', default=[],
+                            help='Не считать ошибкой скан этой таблицы (маленькие справочники).')
+        parser.add_argument('--fail-on-scan', action='store_true',
+                            help='Завершиться с ошибкой, если найден полный скан (для CI).')
+        parser.add_argument('--verbose-plan', action='store_true', help='Печатать план целиком.')
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f'EXPLAIN parsing is not supported for "{connection.vendor}".')
+
+        self.factory = APIRequestFactory()
+        self.user = User.objects.order_by('pk').first() or AnonymousUser()
+        problems = 0
+
+        for label, view_class, actions in self.list_views():
+            if not self.has_permission(view_class, actions):
+                # Например, /tasks/my/ фильтрует по request.user
+                self.stdout.write(self.style.NOTICE(
+                    f'skipped    {label}: needs an authenticated user, the database has none '
+                    f'(create one, e.g. manage.py createsuperuser)'
+                ))
+                continue
+            for params in self.scenarios(view_class):
+                queryset = self.build_queryset(view_class, actions, params)
+                plan = queryset.explain(format=EXPLAIN_FORMAT.get(connection.vendor))
+                scans = [t for t in pattern.findall(plan) if t not in options['ignore_table']]
+                query = '&'.join(f'{k}={v}' for k, v in params.items())
+                title = f'{label}?{query}' if query else label
+                if scans:
+                    problems += 1
+                    self.stdout.write(self.style.WARNING(f'FULL SCAN  {title}: {", ".join(sorted(set(scans)))}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'ok         {title}'))
+                if options['verbose_plan']:
+                    self.stdout.write(plan)
+
+        if problems and options['fail_on_scan']:
+            raise CommandError(f'{problems} queryset(s) do a full table scan.')
+
+    # ---------- views ----------
+    def list_views(self, patterns=None, prefix=''):
+        """Все вьюхи из api_urls, у которых есть list (ListAPIView и ViewSet)."""
+        for pattern in patterns if patterns is not None else api_urls.urlpatterns:
+            if isinstance(pattern, URLResolver):
+                yield from self.list_views(pattern.url_patterns, prefix + str(pattern.pattern))
+                continue
+            if not isinstance(pattern, URLPattern):
+                continue
+            callback = pattern.callback
+            view_class = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+            actions = getattr(callback, 'actions', None) or {}
+            if view_class is None or 'format' in str(pattern.pattern):
+                continue
+            if actions.get('get') == 'list' or (not actions and hasattr(view_class, 'list')):
+                yield (prefix + str(pattern.pattern)).lstrip('^').rstrip('$'), view_class, actions
+
+    def make_view(self, view_class, actions, params):
+        request = Request(self.factory.get('/', params))
+        request.user = self.user
+        view = view_class()
+        view.action_map = actions
+        view.action = actions.get('get')
+        view.request = request
+        view.args, view.kwargs, view.format_kwarg = (), {}, None
+        return view
+
+    def has_permission(self, view_class, actions):
+        view = self.make_view(view_class, actions, {})
+        try:
+            view.check_permissions(view.request)
+        except (NotAuthenticated, PermissionDenied):
+            return False
+        return True
+
+    def build_queryset(self, view_class, actions, params):
+        view = self.make_view(view_class, actions, params)
+        request = view.request
+        queryset = view.filter_queryset(view.get_queryset())
+
+        # Форма запроса как у пагинатора: ORDER BY + LIMIT
+        paginator = view.paginator
+        if isinstance(paginator, CursorPagination):
+            queryset = queryset.order_by(*paginator.get_ordering(request, queryset, view))
+        if paginator is not None:
+            queryset = queryset[:paginator.get_page_size(request) or 10]
+        return queryset
+
+    # ---------- filter scenarios ----------
+    def scenarios(self, view_class):
+        model = view_class.queryset.model if view_class.queryset is not None else None
+        per_field = [params for params in self.filter_groups(view_class, model) if params]
+
+        yield {}
+        yield from per_field
+        if getattr(view_class, 'search_fields', None):
+            yield {'search': 'task'}
+        if len(per_field) > 1:
+            combined = {}
+            for params in per_field:
+                combined.update(params)
+            yield combined
+
+    def filter_groups(self, view_class, model):
+        """Параметры запроса по фильтрам одного поля модели: filterset_class или filterset_fields."""
+        filterset_class = getattr(view_class, 'filterset_class', None)
+        if filterset_class is not None:
+            groups = {}
+            for name, filter_ in filterset_class.base_filters.items():
+                value = self.sample_filter_value(model, filter_)
+                if value is not None:
+                    groups.setdefault(filter_.field_name, {})[name] = value
+            yield from groups.values()
+            return
+
+        filterset_fields = getattr(view_class, 'filterset_fields', None) or {}
+        if isinstance(filterset_fields, (list, tuple)):
+            filterset_fields = {name: ['exact'] for name in filterset_fields}
+        for name, lookups in filterset_fields.items():
+            params = {}
+            for lookup in lookups:
+                value = self.sample_value(model, name, lookup)
+                if value is not None:
+                    params[name if lookup == 'exact' else f'{name}__{lookup}'] = value
+            yield params
+
+    def sample_filter_value(self, model, filter_):
+        if model is None:
+            return None
+        if isinstance(filter_, filters.ChoiceFilter):
+            return filter_.extra['choices'][0][0]
+        if isinstance(filter_, filters.DateFilter):
+            day = timezone.localdate()
+            return (day + timedelta(days=7) if getattr(filter_, 'end', False) else day).isoformat()
+        if isinstance(filter_, filters.NumberFilter):
+            field = model._meta.get_field(filter_.field_name)
+            if field.is_relation:
+                return field.related_model.objects.values_list('pk', flat=True).first()
+            return None
+        return self.sample_value(model, filter_.field_name, filter_.lookup_expr)
+
+    def sample_value(self, model, name, lookup):
+        if model is None:
+            return None
+        field = model._meta.get_field(name)
+        now = timezone.now()
+        if field.choices:
+            return field.choices[0][0]
+        if isinstance(field, models.DateTimeField):
+            # exact по datetime — вырожденный случай, проверяем только диапазоны
+            if lookup == 'exact':
+                return None
+            return (now + timedelta(days=7) if lookup in ('lt', 'lte') else now).isoformat()
+        if isinstance(field, models.ForeignKey):
+            return field.related_model.objects.values_list('pk', flat=True).first()
+        if isinstance(field, models.CharField):
+            return model.objects.values_list(name, flat=True).first()
+        return None
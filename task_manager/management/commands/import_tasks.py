@@ -0,0 +1,225 @@
+import csv
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from task_manager import bulk, changes
+from task_manager.models import Task, Category
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоковый импорт задач или подзадач из CSV/NDJSON. Строки проверяются правилами '
+        'TaskCreateSerializer/SubTaskCreateSerializer и вставляются пачками через bulk_create. '
+        'Категории задаются именами (CSV: через "|", NDJSON: списком). '
+        'Подзадачи ссылаются на задачу через task (id) или task_title. '
+        'CSV читается построчно: многострочные значения в кавычках не поддерживаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None,
+                            help='По умолчанию — по расширению файла.')
+        parser.add_argument('--kind', choices=['task', 'subtask'], default='task')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--offset', type=int, default=0,
+                            help='Продолжить с байтового смещения (печатается в прогрессе после каждой пачки).')
+        parser.add_argument('--errors', default=None,
+                            help='Файл для отклонённых строк (NDJSON). По умолчанию <path>.errors.ndjson.')
+        parser.add_argument('--owner', default=None, help='username владельца создаваемых объектов.')
+        parser.add_argument('--create-categories', action='store_true',
+                            help='Создавать категории, которых нет в БД, и восстанавливать удалённые '
+                                 '(иначе строка отклоняется).')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File "{path}" does not exist.')
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        self.kind = options['kind']
+        self.create_categories = options['create_categories']
+        self.owner = None
+        if options['owner']:
+            try:
+                self.owner = User.objects.get(username=options['owner'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["owner"]}" does not exist.')
+
+        self.load_categories()
+
+        imported = rejected = 0
+        total_size = os.path.getsize(path)
+        started = time.perf_counter()
+        errors_path = options['errors'] or f'{path}.errors.ndjson'
+
+        with open(path, 'rb') as source, open(errors_path, 'a', encoding='utf-8') as errors_file:
+            for rows, offset in self.read_chunks(source, file_format, options['offset'], options['chunk_size']):
+                created, failed = self.import_chunk(rows)
+                imported += created
+                rejected += len(failed)
+                for line_offset, row, errors in failed:
+                    errors_file.write(json.dumps({'offset': line_offset, 'row': row, 'errors': errors},
+                                                 ensure_ascii=False, default=str) + '\n')
+                errors_file.flush()
+                self.stdout.write(
+                    f'offset={offset} ({offset * 100 // max(total_size, 1)}%) '
+                    f'imported={imported} rejected={rejected} '
+                    f'{imported / max(time.perf_counter() - started, 1e-6):.0f} rows/s'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: imported {imported}, rejected {rejected} (see {errors_path}).'
+        ))
+
+    def load_categories(self):
+        # Имя категории -> id, загружаем один раз. Имя уникально и среди мягко удалённых
+        # категорий: такое имя нельзя создать заново, только восстановить категорию
+        categories = Category.all_objects.values_list('name', 'id', 'is_deleted')
+        self.category_ids = {}
+        self.deleted_category_ids = {}
+        for name, pk, is_deleted in categories:
+            (self.deleted_category_ids if is_deleted else self.category_ids)[name] = pk
+
+    # ---------- reading ----------
+    def read_chunks(self, source, file_format, offset, chunk_size):
+        """
+        Отдаёт (rows, offset): rows — список (line_offset, dict | ошибка разбора),
+        offset — позиция сразу после пачки, с неё можно продолжить через --offset.
+        """
+        header = None
+        if file_format == 'csv':
+            header = next(csv.reader([source.readline().decode('utf-8-sig')]), None)
+            if not header:
+                raise CommandError('CSV file has no header row.')
+        if offset:
+            source.seek(offset)
+
+        rows = []
+        while True:
+            line_offset = source.tell()
+            line = source.readline()
+            if not line:
+                break
+            text = line.decode('utf-8').strip()
+            if not text:
+                continue
+            rows.append((line_offset, self.parse_line(text, file_format, header)))
+            if len(rows) >= chunk_size:
+                yield rows, source.tell()
+                rows = []
+        if rows:
+            yield rows, source.tell()
+
+    @staticmethod
+    def parse_line(text, file_format, header):
+        if file_format == 'csv':
+            values = next(csv.reader([text]))
+            if len(values) != len(header):
+                return ValueError(f'Expected {len(header)} columns, got {len(values)}.')
+            return dict(zip(header, values))
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            return exc
+        if not isinstance(row, dict):
+            return ValueError('Expected a JSON object per line.')
+        return row
+
+    # ---------- importing ----------
+    def import_chunk(self, rows):
+        """Одна пачка — одна транзакция. Возвращает (создано, [(offset, row, errors)])."""
+        failed = []
+        items, offsets = [], []
+        task_ids = self.task_ids_by_title(rows) if self.kind == 'subtask' else None
+        for line_offset, row in rows:
+            if isinstance(row, Exception):
+                failed.append((line_offset, None, {'non_field_errors': [str(row)]}))
+                continue
+            item, errors = self.prepare_item(row, task_ids)
+            if errors:
+                failed.append((line_offset, row, errors))
+            else:
+                items.append(item)
+                offsets.append((line_offset, row))
+
+        new_categories = {}
+        with transaction.atomic():
+            if self.kind == 'task':
+                names = [item.pop('category_names') for item in items]
+                accepted, errors = bulk.validate_items(items)
+                # Недостающие категории создаём только для строк, прошедших валидацию
+                new_categories = self.attach_categories(accepted, names)
+                bulk.insert_tasks([data for _, data in accepted], owner=self.owner)
+            else:
+                accepted, errors = bulk.validate_subtask_items(items)
+                bulk.insert_subtasks([data for _, data in accepted], owner=self.owner)
+        # Только после коммита: при откате пачки категорий с этими id нет (или они снова удалены)
+        for name, pk in new_categories.items():
+            self.deleted_category_ids.pop(name, None)
+            self.category_ids[name] = pk
+
+        for index, result in errors.items():
+            line_offset, row = offsets[index]
+            failed.append((line_offset, row, result['errors']))
+        return len(accepted), failed
+
+    def prepare_item(self, row, task_ids=None):
+        item = {key: value for key, value in row.items() if value not in (None, '')}
+        if self.kind == 'subtask':
+            title = item.pop('task_title', None)
+            if 'task' not in item and title is not None:
+                if title not in task_ids:
+                    return None, {'task_title': [f'Task with title "{title}" does not exist.']}
+                item['task'] = task_ids[title]
+            return item, None
+
+        names = item.pop('categories', [])
+        if isinstance(names, str):
+            names = [name.strip() for name in names.split('|') if name.strip()]
+        unknown = [name for name in names if name not in self.category_ids]
+        if unknown and not self.create_categories:
+            return None, {'categories': [
+                f'Category is deleted: {name}' if name in self.deleted_category_ids else f'Unknown category: {name}'
+                for name in unknown
+            ]}
+        item['category_names'] = names
+        return item, None
+
+    def attach_categories(self, accepted, names):
+        """Проставить category_ids; возвращает {имя: id} категорий, созданных или восстановленных в пачке."""
+        missing = {name for index, _ in accepted for name in names[index] if name not in self.category_ids}
+        restored = {name: self.deleted_category_ids[name] for name in missing if name in self.deleted_category_ids}
+        new_categories = dict(restored)
+        if restored:
+            # --create-categories для удалённой категории — восстановление; для клиентов ленты это создание
+            Category.all_objects.filter(pk__in=restored.values()).update(
+                is_deleted=False, deleted_at=None, updated_at=timezone.now(),
+            )
+            changes.record(Category, changes.CREATED, [(pk, None) for pk in restored.values()])
+            missing -= restored.keys()
+        if missing:
+            Category.objects.bulk_create([Category(name=name) for name in sorted(missing)])
+            created = dict(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+            changes.record(Category, changes.CREATED, [(pk, None) for pk in created.values()])
+            new_categories.update(created)
+        for index, data in accepted:
+            data['category_ids'] = [new_categories.get(name) or self.category_ids[name] for name in names[index]]
+        return new_categories
+
+    @staticmethod
+    def task_ids_by_title(rows):
+        """title -> id для подзадач, ссылающихся на задачу по task_title: один запрос на пачку."""
+        titles = {
+            row['task_title'] for _, row in rows
+            if isinstance(row, dict) and row.get('task_title') and not row.get('task')
+        }
+        if not titles:
+            return {}
+        return dict(Task.objects.filter(title__in=titles).values_list('title', 'id'))
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from task_manager.models import ChangeLog
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из журнала изменений (ChangeLog) записи старше --days пачками по id. '
+        'Последняя запись сохраняется всегда: по ней лента отличает устаревший курсор (410).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHANGES_FEED['RETENTION_DAYS'])
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        last_id = ChangeLog.objects.order_by('-id').values_list('id', flat=True).first()
+        if last_id is None:
+            self.stdout.write('Change log is empty.')
+            return
+
+        deleted = 0
+        while True:
+            ids = list(
+                ChangeLog.objects.filter(created_at__lt=cutoff, id__lt=last_id)
+                .order_by('id').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted += ChangeLog.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} change(s) older than {options["days"]} days.'))
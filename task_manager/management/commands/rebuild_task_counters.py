@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики аналитики задач (TaskCounter) по таблицам или сверяет их (--verify).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Только сравнить с эталоном, ничего не меняя. Код выхода 1 при расхождении.')
+
+    def handle(self, *args, **options):
+        expected = counters.compute()
+        mismatches = counters.diff(counters.read(), expected)
+
+        if options['verify']:
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS(f'All {len(expected)} counters are consistent.'))
+                return
+            for key, (stored, actual) in mismatches.items():
+                self.stdout.write(self.style.WARNING(f'{key}: stored {stored}, actual {actual}'))
+            raise CommandError(f'{len(mismatches)} counter(s) out of sync. Run without --verify to rebuild.')
+
+        counters.rebuild(expected)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(expected)} counters ({len(mismatches)} were out of sync).'
+        ))
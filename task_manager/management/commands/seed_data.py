@@ -0,0 +1,155 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from task_manager import counters
+from task_manager.models import Task, SubTask, Category
+
+User = get_user_model()
+
+# Распределение статусов, близкое к живым данным: большинство задач открыто
+STATUS_WEIGHTS = {
+    'NEW': 30,
+    'IN_PROGRESS': 25,
+    'PENDING': 10,
+    'BLOCKED': 5,
+    'DONE': 30,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет БД синтетическими данными для бенчмарков: пользователи, '
+        'категории, задачи, подзадачи и связи задача-категория (bulk_create чанками).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=2000)
+        parser.add_argument('--tasks', type=int, default=100_000)
+        parser.add_argument('--subtasks', type=int, default=1_000_000)
+        parser.add_argument('--categories-per-task', type=int, default=3,
+                            help='Максимальное число категорий у одной задачи.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--prefix', default=None,
+                            help='Префикс заголовков (title уникален). По умолчанию — метка времени.')
+        parser.add_argument('--seed', type=int, default=None, help='Seed для random.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.now = timezone.now()
+        prefix = options['prefix'] or f'seed-{int(time.time())}'
+        started = time.perf_counter()
+
+        user_ids = self.seed_users(prefix, options['users'])
+        category_ids = self.seed_categories(prefix, options['categories'])
+        task_ids = self.seed_tasks(prefix, options['tasks'], user_ids)
+        self.seed_task_categories(task_ids, category_ids, options['categories_per_task'])
+        self.seed_subtasks(prefix, options['subtasks'], task_ids, user_ids)
+        # bulk_create обходит сигналы — счётчики аналитики пересчитываем целиком
+        counters.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done in {time.perf_counter() - started:.1f}s (prefix "{prefix}").'
+        ))
+
+    # ---------- helpers ----------
+    def chunks(self, total, build):
+        """Генерирует списки объектов по chunk_size штук, build(i) -> объект."""
+        for start in range(0, total, self.chunk_size):
+            yield [build(i) for i in range(start, min(start + self.chunk_size, total))]
+
+    def bulk_insert(self, model, total, build, label):
+        created = 0
+        for batch in self.chunks(total, build):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.chunk_size)
+            created += len(batch)
+            self.stdout.write(f'  {label}: {created}/{total}', ending='\r')
+        self.stdout.write(f'  {label}: {created}/{total}')
+
+    def random_status(self):
+        return self.rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+
+    def random_dates(self):
+        created_at = self.now - timedelta(minutes=self.rng.randint(0, 365 * 24 * 60))
+        deadline = created_at + timedelta(days=self.rng.randint(-10, 60))
+        return created_at, deadline
+
+    # ---------- seeders ----------
+    def seed_users(self, prefix, total):
+        password = make_password('password')  # хешируем один раз, а не на каждого пользователя
+        self.bulk_insert(
+            User, total,
+            lambda i: User(username=f'{prefix}-user-{i}', email=f'{prefix}-user-{i}@example.com',
+                           password=password),
+            'users',
+        )
+        return list(User.objects.filter(username__startswith=f'{prefix}-user-').values_list('id', flat=True))
+
+    def seed_categories(self, prefix, total):
+        self.bulk_insert(
+            Category, total,
+            lambda i: Category(name=f'{prefix}-category-{i}'),
+            'categories',
+        )
+        return list(Category.objects.filter(name__startswith=f'{prefix}-category-').values_list('id', flat=True))
+
+    def seed_tasks(self, prefix, total, user_ids):
+        def build(i):
+            created_at, deadline = self.random_dates()
+            return Task(
+                title=f'{prefix}-task-{i}',
+                description=f'Synthetic task {i} for load testing',
+                status=self.random_status(),
+                deadline=deadline,
+                created_at=created_at,
+                owner_id=self.rng.choice(user_ids) if user_ids else None,
+            )
+
+        self.bulk_insert(Task, total, build, 'tasks')
+        # id перечитываем из БД: MySQL не возвращает pk из bulk_create
+        return list(Task.objects.filter(title__startswith=f'{prefix}-task-').values_list('id', flat=True))
+
+    def seed_task_categories(self, task_ids, category_ids, per_task):
+        if not task_ids or not category_ids or per_task <= 0:
+            return
+        through = Task.categories.through
+        links = []
+        total = 0
+        for task_id in task_ids:
+            count = self.rng.randint(0, min(per_task, len(category_ids)))
+            for category_id in self.rng.sample(category_ids, count):
+                links.append(through(task_id=task_id, category_id=category_id))
+            if len(links) >= self.chunk_size:
+                through.objects.bulk_create(links, batch_size=self.chunk_size)
+                total += len(links)
+                links = []
+                self.stdout.write(f'  task categories: {total}', ending='\r')
+        through.objects.bulk_create(links, batch_size=self.chunk_size)
+        self.stdout.write(f'  task categories: {total + len(links)}')
+
+    def seed_subtasks(self, prefix, total, task_ids, user_ids):
+        if not task_ids:
+            return
+
+        def build(i):
+            created_at, deadline = self.random_dates()
+            return SubTask(
+                title=f'{prefix}-subtask-{i}',
+                description=f'Synthetic subtask {i} for load testing',
+                status=self.random_status(),
+                deadline=deadline,
+                created_at=created_at,
+                task_id=self.rng.choice(task_ids),
+                owner_id=self.rng.choice(user_ids) if user_ids else None,
+            )
+
+        self.bulk_insert(SubTask, total, build, 'subtasks')
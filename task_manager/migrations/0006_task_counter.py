@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:14
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Task = apps.get_model('task_manager', 'Task')
+    TaskCounter = apps.get_model('task_manager', 'TaskCounter')
+    values = {'total': Task.objects.count()}
+    for row in Task.objects.order_by().values('status').annotate(count=Count('id')):
+        values[f"status:{row['status']}"] = row['count']
+    through = Task.categories.through
+    for row in through.objects.order_by().values('category_id').annotate(count=Count('id')):
+        values[f"category:{row['category_id']}"] = row['count']
+    TaskCounter.objects.bulk_create([TaskCounter(key=k, value=v) for k, v in values.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_manager', '0005_add_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Task counter',
+                'verbose_name_plural': 'Task counters',
+                'db_table': 'task_manager_task_counter',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -15,14 +15,17 @@ STATUS_CHOICES = [
 
 class CategoryQuerySet(models.QuerySet):
     def delete(self):
-        # Soft delete для queryset
+        # Soft delete для queryset; UPDATE обходит сигналы — удаление пишем в ленту изменений сами
+        from . import changes
         now = timezone.now()
-        return super().update(is_deleted=True, deleted_at=now)
+        ids = list(self.filter(is_deleted=False).values_list('pk', flat=True))
+        changes.record(self.model, changes.DELETED, [(pk, None) for pk in ids])
+        return super().update(is_deleted=True, deleted_at=now, updated_at=now)
 
 
-class CategoryManager(models.Manager):
+class CategoryManager(models.Manager.from_queryset(CategoryQuerySet)):
     def get_queryset(self):
-        return CategoryQuerySet(self.model, using=self._db).filter(is_deleted=False)
+        return super().get_queryset().filter(is_deleted=False)
 
 
 class Category(models.Model):
@@ -30,6 +33,13 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    # auto_now не срабатывает в QuerySet.update() — там updated_at выставляется явно
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Только не удалённые: API, формы, Task.categories. all_objects — все строки
+    # (уникальность имени, импорт); delete() там тоже мягкое
+    objects = CategoryManager()
+    all_objects = CategoryQuerySet.as_manager()
 
     class Meta:
         db_table = 'task_manager_category'
@@ -38,24 +48,68 @@ class Category(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['name'], name='unique_category_name')
         ]
+        # Планы — manage.py explain_views --verbose-plan
+        indexes = [
+            # Category.objects (WHERE NOT is_deleted) ORDER BY name: /api/categories/, формы, count_tasks
+            models.Index(fields=['name'], condition=models.Q(is_deleted=False), name='category_active_name_idx'),
+        ]
 
     def delete(self, *args, **kwargs):
         self.is_deleted = True
         self.deleted_at = timezone.now()
-        self.save(update_fields=['is_deleted', 'deleted_at'])
+        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
 
     def __str__(self):
         return self.name
 
 
+class TaskQuerySet(models.QuerySet):
+    """
+    Счётчики подзадач коррелированными подзапросами по индексу (task, status).
+    Считаются только для строк, попавших на страницу, в отличие от JOIN + GROUP BY
+    по всей таблице.
+    """
+
+    def touch(self):
+        """Обновить updated_at: в представление задачи входят подзадачи и связи с категориями."""
+        return self.update(updated_at=timezone.now())
+
+    def with_subtask_count(self):
+        return self.annotate(subtasks_count=self._subtask_count())
+
+    def with_subtask_status_counts(self):
+        """subtasks_<status>_count для каждого статуса, например subtasks_done_count."""
+        return self.annotate(**{
+            subtask_status_count_attr(status): self._subtask_count(status=status)
+            for status, _ in STATUS_CHOICES
+        })
+
+    @staticmethod
+    def _subtask_count(**filters):
+        return models.functions.Coalesce(models.Subquery(
+            SubTask.objects.filter(task=models.OuterRef('pk'), **filters)
+            .order_by().values('task').annotate(n=models.Count('pk')).values('n'),
+            output_field=models.IntegerField(),
+        ), 0)
+
+
+def subtask_status_count_attr(status):
+    return f'subtasks_{status.lower()}_count'
+
+
 class Task(models.Model):
-    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
+    # Индекс по owner_id — префикс task_owner_created_idx, отдельный не нужен
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks',
+                              db_index=False)
     title = models.CharField(max_length=200)
     description = models.TextField()
     categories = models.ManyToManyField('Category')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NEW')
     deadline = models.DateTimeField()
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TaskQuerySet.as_manager()
 
     class Meta:
         db_table = 'task_manager_task'
@@ -65,6 +119,26 @@ class Task(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['title'], name='unique_task_title')
         ]
+        # Планы — manage.py explain_views --verbose-plan
+        indexes = [
+            # /tasks/my/: WHERE owner_id = ? ORDER BY created_at DESC
+            models.Index(fields=['owner', '-created_at'], name='task_owner_created_idx'),
+            # ?status=
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            # ?deadline__gte/__lte, ?deadline_from/_to
+            models.Index(fields=['deadline'], name='task_deadline_idx'),
+            # Списки без фильтров: ORDER BY created_at DESC LIMIT
+            models.Index(fields=['-created_at'], name='task_created_idx'),
+        ]
+
+    # Статус в том виде, в каком он прочитан из БД (для счётчиков аналитики, см. signals.py)
+    _loaded_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
 
     def __str__(self):
         return self.title
@@ -74,10 +148,12 @@ class SubTask(models.Model):
     owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='subtasks')
     title = models.CharField(max_length=200)
     description = models.TextField()
-    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='subtasks')
+    # Индекс по task_id — префикс subtask_task_created_idx и subtask_task_status_idx
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='subtasks', db_index=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NEW')
     deadline = models.DateTimeField()
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         db_table = 'task_manager_subtask'
@@ -87,6 +163,67 @@ class SubTask(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['title'], name='unique_subtask_title')
         ]
+        # Планы — manage.py explain_views --verbose-plan
+        indexes = [
+            # ?task=, страница задачи, последние подзадачи в /api/tasks/
+            models.Index(fields=['task', '-created_at'], name='subtask_task_created_idx'),
+            # Счётчики подзадач по статусам (TaskQuerySet.with_subtask_counts) без чтения строк
+            models.Index(fields=['task', 'status'], name='subtask_task_status_idx'),
+            # ?status=
+            models.Index(fields=['status', 'deadline'], name='subtask_status_deadline_idx'),
+            # ?deadline__gte/__lte, ?deadline_from/_to
+            models.Index(fields=['deadline'], name='subtask_deadline_idx'),
+            # Списки без фильтров: ORDER BY created_at DESC LIMIT
+            models.Index(fields=['-created_at'], name='subtask_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class TaskCounter(models.Model):
+    """
+    Предрасчитанные счётчики для task_analytics_api_view.
+    Ключи: 'total', 'status:<STATUS>', 'category:<id>'. Обновляются в task_manager/signals.py,
+    пересчитываются командой rebuild_task_counters.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'task_manager_task_counter'
+        verbose_name = 'Task counter'
+        verbose_name_plural = 'Task counters'
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
+
+
+class ChangeLog(models.Model):
+    """
+    Журнал изменений Task/SubTask/Category для ленты /api/changes/ (см. changes.py).
+    id — монотонная последовательность, по ней идёт keyset-пагинация ленты.
+    Удаления (в том числе каскадные и мягкие) остаются записями action='deleted'.
+    """
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+
+    # model_name: 'task', 'subtask', 'category'
+    kind = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=8, choices=ACTION_CHOICES)
+    # Без FK: запись переживает удаление пользователя
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'task_manager_change_log'
+        verbose_name = 'Change'
+        verbose_name_plural = 'Changes'
+        ordering = ['id']
+
+    def __str__(self):
+        return f'#{self.pk} {self.kind}:{self.object_id} {self.action}'
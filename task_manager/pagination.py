@@ -1,6 +1,47 @@
-from rest_framework.pagination import CursorPagination
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
 
 class GlobalCursorPagination(CursorPagination):
+    """
+    CursorPagination по -created_at. Для async-вьюх (async_views.py) страница
+    выбирается тем же paginate_queryset из DRF в sync_to_async: у CursorPagination
+    нет отдельного шага запроса, который можно было бы заменить на aiterator().
+    Поэтому async-списки с этим пагинатором не используют async ORM: весь разбор
+    курсора и запрос страницы идут одним переходом в поток, как в синхронной вьюхе.
+    """
     page_size = 5
     ordering = '-created_at'
     page_size_query_param = None
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """PageNumberPagination + apaginate_queryset: COUNT через acount(), страница через aiterator()."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count — cached_property: подставляем результат async COUNT
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        self.page.object_list = [obj async for obj in self.page.object_list.aiterator(chunk_size=page_size)]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        return list(self.page)
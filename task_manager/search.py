@@ -0,0 +1,219 @@
+"""
+Полнотекстовый поиск для ?search= на задачах и подзадачах.
+
+Бэкенд выбирается в settings.SEARCH_BACKEND (см. core/settings.py):
+- SQLiteFTS5SearchBackend — внешняя FTS5-таблица <db_table>_fts, синхронизируется триггерами;
+- MySQLFulltextSearchBackend — FULLTEXT-индекс, MySQL обновляет его сам;
+- IContainsSearchBackend — без индекса, как SearchFilter (LIKE '%term%').
+
+Индексы и триггеры создаются идемпотентно после каждого migrate (post_migrate),
+поэтому переживают пересоздание таблицы при ALTER на SQLite.
+"""
+import operator
+import re
+from functools import lru_cache, reduce
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+# Модель -> индексируемые поля. Должны совпадать с search_fields во вьюхах.
+SEARCH_INDEXES = {
+    'task_manager.Task': ('title', 'description'),
+    'task_manager.SubTask': ('title', 'description'),
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class IContainsSearchBackend:
+    """
+    Без индекса: каждое слово ищется через icontains хотя бы в одном из полей,
+    как в SearchFilter. Поля с префиксами SearchFilter (^, =, @, $) — самому SearchFilter.
+    """
+    vendor = None
+
+    def supports(self, queryset, search_fields):
+        return all(field[0] not in SearchFilter.lookup_prefixes for field in search_fields)
+
+    def install(self, connection, models):
+        pass
+
+    def search(self, queryset, terms, search_fields):
+        for term in terms:
+            queryset = queryset.filter(reduce(operator.or_, (
+                Q(**{f'{field}__icontains': term}) for field in search_fields
+            )))
+        return queryset
+
+
+class BaseFullTextSearchBackend(IContainsSearchBackend):
+    def supports(self, queryset, search_fields):
+        fields = SEARCH_INDEXES.get(queryset.model._meta.label)
+        if not fields or set(search_fields) - set(fields):
+            return False
+        using = queryset.db
+        return connections[using].vendor == self.vendor and self.is_installed(using, queryset.model._meta.db_table)
+
+    def is_installed(self, using, db_table):
+        return True
+
+    @staticmethod
+    def tokens(terms):
+        return [token for term in terms for token in TOKEN_RE.findall(term)]
+
+
+class SQLiteFTS5SearchBackend(BaseFullTextSearchBackend):
+    vendor = 'sqlite'
+
+    def is_installed(self, using, db_table):
+        return _sqlite_fts_installed(using, db_table)
+
+    def install(self, connection, models):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in models:
+                fields = SEARCH_INDEXES[model._meta.label]
+                table = model._meta.db_table
+                fts = f'{table}_fts'
+                pk = model._meta.pk.column
+                columns = ', '.join(qn(f) for f in fields)
+                new_values = ', '.join(f'new.{qn(f)}' for f in fields)
+                old_values = ', '.join(f'old.{qn(f)}' for f in fields)
+                created = not _sqlite_table_exists(connection, fts)
+
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {qn(fts)} USING fts5("
+                    f"{columns}, content={qn(table)}, content_rowid={qn(pk)})"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_ai')} AFTER INSERT ON {qn(table)} BEGIN "
+                    f"INSERT INTO {qn(fts)}(rowid, {columns}) VALUES (new.{qn(pk)}, {new_values}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_ad')} AFTER DELETE ON {qn(table)} BEGIN "
+                    f"INSERT INTO {qn(fts)}({qn(fts)}, rowid, {columns}) "
+                    f"VALUES ('delete', old.{qn(pk)}, {old_values}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_au')} AFTER UPDATE OF {columns} ON {qn(table)} BEGIN "
+                    f"INSERT INTO {qn(fts)}({qn(fts)}, rowid, {columns}) "
+                    f"VALUES ('delete', old.{qn(pk)}, {old_values}); "
+                    f"INSERT INTO {qn(fts)}(rowid, {columns}) VALUES (new.{qn(pk)}, {new_values}); END"
+                )
+                if created:
+                    # Проиндексировать строки, существовавшие до появления FTS-таблицы
+                    cursor.execute(f"INSERT INTO {qn(fts)}({qn(fts)}) VALUES ('rebuild')")
+        _sqlite_fts_installed.cache_clear()
+
+    def search(self, queryset, terms, search_fields):
+        tokens = self.tokens(terms)
+        if not tokens:
+            return queryset.none()
+        # Каждое слово в кавычках (экранируем синтаксис FTS5) и как префикс: поиск «по мере набора»
+        match = ' '.join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+        model = queryset.model
+        qn = connections[queryset.db].ops.quote_name
+        table = model._meta.db_table
+        fts = qn(f'{table}_fts')
+        rank_sql = (
+            f'SELECT -bm25({fts}) FROM {fts} '
+            f'WHERE {fts} MATCH %s AND {fts}.rowid = {qn(table)}.{qn(model._meta.pk.column)}'
+        )
+        return queryset.annotate(search_rank=RawSQL(rank_sql, [match], output_field=FloatField())).filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match])
+        )
+
+
+class MySQLFulltextSearchBackend(BaseFullTextSearchBackend):
+    vendor = 'mysql'
+
+    def install(self, connection, models):
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in models:
+                table = model._meta.db_table
+                index_name = f'{table}_search_ft'
+                cursor.execute(f'SHOW INDEX FROM {qn(table)} WHERE Key_name = %s', [index_name])
+                if cursor.fetchone():
+                    continue
+                columns = ', '.join(qn(f) for f in SEARCH_INDEXES[model._meta.label])
+                cursor.execute(f'ALTER TABLE {qn(table)} ADD FULLTEXT INDEX {qn(index_name)} ({columns})')
+
+    def search(self, queryset, terms, search_fields):
+        tokens = self.tokens(terms)
+        if not tokens:
+            return queryset.none()
+        against = ' '.join(f'+{token}*' for token in tokens)
+
+        qn = connections[queryset.db].ops.quote_name
+        table = queryset.model._meta.db_table
+        columns = ', '.join(f'{qn(table)}.{qn(f)}' for f in SEARCH_INDEXES[queryset.model._meta.label])
+        match_sql = f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)'
+        return queryset.annotate(
+            search_rank=RawSQL(match_sql, [against], output_field=FloatField())
+        ).filter(search_rank__gt=0)
+
+
+def _sqlite_table_exists(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [name])
+        return cursor.fetchone() is not None
+
+
+@lru_cache(maxsize=None)
+def _sqlite_fts_installed(using, db_table):
+    return _sqlite_table_exists(connections[using], f'{db_table}_fts')
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    return import_string(getattr(settings, 'SEARCH_BACKEND', 'task_manager.search.IContainsSearchBackend'))()
+
+
+def install_search_indexes(sender=None, using='default', apps=None, **kwargs):
+    """post_migrate: создать FTS-таблицы/индексы и триггеры, если их нет."""
+    from django.apps import apps as global_apps
+
+    backend = get_search_backend()
+    connection = connections[using]
+    if backend.vendor != connection.vendor:
+        return
+    models = [global_apps.get_model(label) for label in SEARCH_INDEXES]
+    backend.install(connection, [m for m in models if router.allow_migrate_model(using, m)])
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    SearchFilter, который отдаёт ?search= в полнотекстовый бэкенд, если тот
+    поддерживает модель и search_fields вьюхи. Иначе — IContainsSearchBackend.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+
+        for backend in (get_search_backend(), IContainsSearchBackend()):
+            if backend.supports(queryset, search_fields):
+                return backend.search(queryset, search_terms, search_fields)
+        return super().filter_queryset(request, queryset, view)
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """
+    Если queryset пришёл из полнотекстового поиска и ?ordering= не задан,
+    сортирует по релевантности (search_rank), затем по умолчанию вьюхи.
+    CursorPagination берёт сортировку отсюда же, поэтому курсор идёт по рангу.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return ['-search_rank', *(ordering or [])]
+        return ordering
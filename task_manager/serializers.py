@@ -1,22 +1,58 @@
+from django.conf import settings
+from django.db.models import Count
 from rest_framework import serializers
-from .models import Task, Category, SubTask
+from .fieldsets import DynamicFieldsMixin
+from .loading import Annotate, Columns, PrefetchRelated, SelectRelated
+from .models import Task, Category, SubTask, STATUS_CHOICES, subtask_status_count_attr
 from django.utils import timezone
 
 
+def subtasks_count(task):
+    """Аннотация из Task.objects.with_subtask_count(), иначе COUNT по задаче."""
+    if hasattr(task, 'subtasks_count'):
+        return task.subtasks_count
+    return task.subtasks.count()
 
-class CategorySerializer(serializers.ModelSerializer):
+
+def subtasks_limit(request, default):
+    """?subtasks_limit= в пределах TASK_SUBTASKS_EMBED_MAX_LIMIT, без параметра — default."""
+    value = request.query_params.get('subtasks_limit') if request is not None else None
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise serializers.ValidationError({'subtasks_limit': 'A valid integer is required.'})
+    return max(0, min(limit, settings.TASK_SUBTASKS_EMBED_MAX_LIMIT))
+
+
+def embedded_subtasks_limit(request):
+    """Списки задач: последние TASK_SUBTASKS_EMBED_LIMIT подзадач, если не задан ?subtasks_limit=."""
+    return subtasks_limit(request, settings.TASK_SUBTASKS_EMBED_LIMIT)
+
+
+def requested_subtasks_limit(request):
+    """Одна задача: все подзадачи, ограничение — только по ?subtasks_limit=."""
+    return subtasks_limit(request, None)
+
+
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name']
 
 
-class SubTaskSerializer(serializers.ModelSerializer):
+class SubTaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     owner = serializers.CharField(source='owner.username', read_only=True)
 
     class Meta:
         model = SubTask
         fields = ['id', 'title', 'description', 'status', 'deadline', 'created_at', 'owner']
         read_only_fields = ['created_at']
+        # Как вьюхи загружают поля-связи (см. task_manager/loading.py)
+        eager_loading = {
+            'owner': SelectRelated('owner', only=['username']),
+        }
 
 class SubTaskCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,7 +61,7 @@ class SubTaskCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     owner = serializers.CharField(source='owner.username', read_only=True)
 
     categories = CategorySerializer(many=True, read_only=True)
@@ -34,15 +70,40 @@ class TaskSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
-    subtasks = SubTaskSerializer(many=True, read_only=True)
+    # recent_subtasks — последние N подзадач на задачу, счётчики — аннотации (см. Meta.eager_loading)
+    subtasks = SubTaskSerializer(source='recent_subtasks', many=True, read_only=True)
+    subtasks_count = serializers.SerializerMethodField()
+    subtasks_by_status = serializers.SerializerMethodField()
 
     class Meta:
         model = Task
         fields = [
             'id', 'title', 'description', 'categories', 'category_ids',
-            'status', 'deadline', 'created_at', 'subtasks', 'owner'
+            'status', 'deadline', 'created_at', 'subtasks', 'subtasks_count',
+            'subtasks_by_status', 'owner'
         ]
         read_only_fields = ['created_at', 'owner']
+        # С ?fields= / ?expand= вложенные списки отдаются только по запросу (см. fieldsets.py)
+        expandable_fields = ['categories', 'subtasks']
+        eager_loading = {
+            'owner': SelectRelated('owner', only=['username']),
+            'categories': PrefetchRelated('categories', CategorySerializer),
+            'subtasks': PrefetchRelated(
+                'subtasks', SubTaskSerializer, to_attr='recent_subtasks',
+                order_by=['-created_at'], limit=embedded_subtasks_limit,
+            ),
+            'subtasks_count': Annotate('with_subtask_count'),
+            'subtasks_by_status': Annotate('with_subtask_status_counts'),
+        }
+
+    def get_subtasks_count(self, obj):
+        return subtasks_count(obj)
+
+    def get_subtasks_by_status(self, obj):
+        if not hasattr(obj, subtask_status_count_attr(STATUS_CHOICES[0][0])):
+            counts = dict(obj.subtasks.order_by().values_list('status').annotate(n=Count('pk')))
+            return {status: counts.get(status, 0) for status, _ in STATUS_CHOICES}
+        return {status: getattr(obj, subtask_status_count_attr(status)) for status, _ in STATUS_CHOICES}
 
     def create(self, validated_data):
         category_ids = validated_data.pop('category_ids', [])
@@ -70,14 +131,27 @@ class TaskSerializer(serializers.ModelSerializer):
         return instance
 
 
+class TaskRetrieveSerializer(TaskSerializer):
+    """TaskSerializer для GET /api/tasks/<pk>/: подзадачи по умолчанию не обрезаются."""
+
+    class Meta(TaskSerializer.Meta):
+        eager_loading = {
+            **TaskSerializer.Meta.eager_loading,
+            'subtasks': PrefetchRelated(
+                'subtasks', SubTaskSerializer, to_attr='recent_subtasks',
+                order_by=['-created_at'], limit=requested_subtasks_limit,
+            ),
+        }
+
+
 class CategoryCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name']
 
     def validate_name(self, value):
-        # Базовая проверка уникальности среди не «удалённых» категорий
-        qs = Category.objects.all()
+        # Уникальность имени — по всем строкам, включая «удалённые» (UniqueConstraint)
+        qs = Category.all_objects.all()
         if self.instance:
             qs = qs.exclude(pk=self.instance.pk)
         if qs.filter(name=value).exists():
@@ -87,7 +161,7 @@ class CategoryCreateSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         name = validated_data.get('name')
-        if Category.objects.filter(name=name).exclude(id=instance.id).exists():
+        if Category.all_objects.filter(name=name).exclude(id=instance.id).exists():
             raise serializers.ValidationError(
                 "Category with this name already exists."
             )
@@ -111,9 +185,16 @@ class TaskDetailSerializer(serializers.ModelSerializer):
             'created_at', 'subtasks', 'subtasks_count', 'overdue', 'owner'
         ]
         read_only_fields = ['created_at', 'owner']
+        eager_loading = {
+            'owner': SelectRelated('owner', only=['username']),
+            'categories': PrefetchRelated('categories', CategorySerializer),
+            'subtasks': PrefetchRelated('subtasks', SubTaskSerializer, order_by=['-created_at']),
+            'subtasks_count': Annotate('with_subtask_count'),
+            'overdue': Columns('deadline', 'status'),
+        }
 
     def get_subtasks_count(self, obj):
-        return obj.subtasks.count()
+        return subtasks_count(obj)
 
     def get_overdue(self, obj):
         return obj.deadline < timezone.now() and obj.status != 'DONE'
@@ -146,3 +227,72 @@ class TaskCreateSerializer(serializers.ModelSerializer):
             task.categories.set(categories)
 
         return task
+
+
+class TaskBulkItemSerializer(TaskCreateSerializer):
+    """
+    Элемент пакетного создания задач (POST /api/tasks/bulk/).
+    Те же правила, что у TaskCreateSerializer, но уникальность title
+    проверяется одним запросом на весь пакет в task_manager/bulk.py.
+    """
+
+    class Meta(TaskCreateSerializer.Meta):
+        extra_kwargs = {'title': {'validators': []}}
+
+
+class BulkStatusSerializer(serializers.Serializer):
+    """Тело POST /api/tasks/bulk-status/ и /api/subtasks/bulk-status/."""
+    status = serializers.ChoiceField(choices=STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=settings.TASK_BULK_MAX_BATCH,
+    )
+
+
+class SubTaskBulkItemSerializer(SubTaskCreateSerializer):
+    """
+    Элемент пакетной загрузки подзадач (manage.py import_tasks --kind subtask).
+    task — просто id: существование задач и уникальность title проверяются
+    одним запросом на пачку в task_manager/bulk.py.
+    """
+    task = serializers.IntegerField(min_value=1)
+
+    class Meta(SubTaskCreateSerializer.Meta):
+        extra_kwargs = {'title': {'validators': []}}
+
+
+class TaskChangeSerializer(serializers.ModelSerializer):
+    """
+    Задача в ленте /api/changes/: собственные поля и id категорий.
+    Подзадачи приходят в ленте отдельными записями.
+    """
+    owner = serializers.CharField(source='owner.username', read_only=True)
+    category_ids = serializers.PrimaryKeyRelatedField(source='categories', many=True, read_only=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            'id', 'title', 'description', 'category_ids', 'status', 'deadline',
+            'created_at', 'updated_at', 'owner',
+        ]
+        eager_loading = {
+            'owner': SelectRelated('owner', only=['username']),
+            'category_ids': PrefetchRelated('categories', CategorySerializer),
+        }
+
+
+class SubTaskChangeSerializer(serializers.ModelSerializer):
+    """Подзадача в ленте /api/changes/: с id задачи, чтобы клиент знал, куда её положить."""
+    owner = serializers.CharField(source='owner.username', read_only=True)
+
+    class Meta:
+        model = SubTask
+        fields = [
+            'id', 'title', 'description', 'task', 'status', 'deadline',
+            'created_at', 'updated_at', 'owner',
+        ]
+        eager_loading = {
+            'owner': SelectRelated('owner', only=['username']),
+        }
@@ -0,0 +1,130 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import changes, counters
+from .models import Task, SubTask, Category
+
+
+# ========== Счётчики аналитики ==========
+@receiver(pre_save, sender=Task)
+def load_status_before_save(sender, instance, **kwargs):
+    # Объект собран вручную или статус был отложен через only()/defer()
+    if not instance._state.adding and instance._loaded_status is None:
+        instance._loaded_status = Task.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Task)
+def update_counters_on_task_save(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(counters.task_deltas(instance.status))
+    else:
+        old_status = instance._loaded_status
+        if old_status is not None and old_status != instance.status:
+            counters.bump({
+                counters.status_key(old_status): -1,
+                counters.status_key(instance.status): 1,
+            })
+    instance._loaded_status = instance.status
+
+
+@receiver(pre_delete, sender=Task)
+def remember_task_categories(sender, instance, **kwargs):
+    # Связи M2M удалятся каскадом без m2m_changed — запоминаем их заранее
+    instance._counter_category_ids = list(instance.categories.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Task)
+def update_counters_on_task_delete(sender, instance, **kwargs):
+    status = instance._loaded_status or instance.status
+    counters.bump(counters.task_deltas(status, getattr(instance, '_counter_category_ids', ()), sign=-1))
+
+
+@receiver(m2m_changed, sender=Task.categories.through)
+def update_counters_on_categories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_remove':
+        # remove() может получить id, которых нет в связи: считаем только реально связанные
+        column = 'task_id' if reverse else 'category_id'
+        owner = {'category_id': instance.pk} if reverse else {'task_id': instance.pk}
+        instance._counter_removed = list(
+            sender.objects.filter(**owner, **{f'{column}__in': pk_set}).values_list(column, flat=True)
+        )
+        return
+    if action == 'pre_clear':
+        column = 'task_id' if reverse else 'category_id'
+        owner = {'category_id': instance.pk} if reverse else {'task_id': instance.pk}
+        instance._counter_removed = list(sender.objects.filter(**owner).values_list(column, flat=True))
+        return
+
+    if action == 'post_add':
+        ids, sign = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        ids, sign = instance.__dict__.pop('_counter_removed', []), -1
+    else:
+        return
+
+    if reverse:
+        # category.task_set.add(...): одна категория, несколько задач
+        deltas = {counters.category_key(instance.pk): sign * len(ids)}
+    else:
+        deltas = {counters.category_key(category_id): sign for category_id in ids}
+    counters.bump(deltas)
+
+
+# ========== updated_at задачи ==========
+# Подзадачи и категории входят в представление задачи (ETag в task_manager/conditional.py)
+@receiver(post_save, sender=SubTask)
+def touch_task_on_subtask_save(sender, instance, **kwargs):
+    Task.objects.filter(pk=instance.task_id).touch()
+
+
+@receiver(post_delete, sender=SubTask)
+def touch_task_on_subtask_delete(sender, instance, origin=None, **kwargs):
+    # Каскад от удаления самой задачи — трогать нечего
+    if isinstance(origin, Task) or getattr(origin, 'model', None) is Task:
+        return
+    Task.objects.filter(pk=instance.task_id).touch()
+
+
+@receiver(m2m_changed, sender=Task.categories.through)
+def touch_task_on_categories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # category.task_set.clear(): после очистки связанные задачи уже не найти
+        tasks = Task.objects.filter(pk__in=sender.objects.filter(category_id=instance.pk).values('task_id'))
+        changes.record_queryset(tasks, changes.UPDATED)
+        tasks.touch()
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # id категорий входят в задачу в ленте изменений (changes.py)
+    if not reverse:
+        Task.objects.filter(pk=instance.pk).touch()
+        changes.record_instance(instance, changes.UPDATED)
+    elif action != 'post_clear':
+        tasks = Task.objects.filter(pk__in=pk_set)
+        tasks.touch()
+        changes.record_queryset(tasks, changes.UPDATED)
+
+
+# ========== Лента изменений (changes.py) ==========
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=SubTask)
+def record_change_on_save(sender, instance, created, **kwargs):
+    changes.record_instance(instance, changes.CREATED if created else changes.UPDATED)
+
+
+@receiver(post_save, sender=Category)
+def record_category_change_on_save(sender, instance, created, **kwargs):
+    # Category.delete() — мягкое удаление через save(): для клиентов это удаление
+    if instance.is_deleted:
+        action = changes.DELETED
+    else:
+        action = changes.CREATED if created else changes.UPDATED
+    changes.record_instance(instance, action)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SubTask)
+@receiver(post_delete, sender=Category)
+def record_change_on_delete(sender, instance, **kwargs):
+    # В том числе подзадачи, удалённые каскадом вместе с задачей
+    changes.record_instance(instance, changes.DELETED)
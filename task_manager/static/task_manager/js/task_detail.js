@@ -0,0 +1,42 @@
+function applySubtaskFilters() {
+    const status = document.getElementById('subtask-status-filter').value;
+    const dateField = document.getElementById('subtask-date-field').value;
+    const dateFrom = document.getElementById('subtask-date-from').value;
+    const dateTo = document.getElementById('subtask-date-to').value;
+
+    let url = new URL(window.location.href);
+
+    // Clear existing subtask filters
+    url.searchParams.delete('subtask_status');
+    url.searchParams.delete('subtask_date_field');
+    url.searchParams.delete('subtask_date_from');
+    url.searchParams.delete('subtask_date_to');
+    url.searchParams.delete('subtask_after');
+
+    // Add new filters
+    if (status) url.searchParams.set('subtask_status', status);
+    if (dateField) url.searchParams.set('subtask_date_field', dateField);
+    if (dateFrom) url.searchParams.set('subtask_date_from', dateFrom);
+    if (dateTo) url.searchParams.set('subtask_date_to', dateTo);
+
+    window.location.href = url.toString();
+}
+
+function clearSubtaskFilters() {
+    let url = new URL(window.location.href);
+    url.searchParams.delete('subtask_status');
+    url.searchParams.delete('subtask_date_field');
+    url.searchParams.delete('subtask_date_from');
+    url.searchParams.delete('subtask_date_to');
+    url.searchParams.delete('subtask_after');
+    window.location.href = url.toString();
+}
+
+// Apply filters when Enter is pressed in date inputs
+document.getElementById('subtask-date-from').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') applySubtaskFilters();
+});
+
+document.getElementById('subtask-date-to').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') applySubtaskFilters();
+});
@@ -0,0 +1,39 @@
+function applyFilters() {
+    const status = document.getElementById('status-filter').value;
+    const category = document.getElementById('category-filter').value;
+    const dateField = document.getElementById('date-field').value;
+    const dateFrom = document.getElementById('date-from').value;
+    const dateTo = document.getElementById('date-to').value;
+
+    let url = new URL(window.location.href);
+
+    // Clear all existing filters (and the page cursor)
+    url.searchParams.delete('after');
+    url.searchParams.delete('status');
+    url.searchParams.delete('category');
+    url.searchParams.delete('date_field');
+    url.searchParams.delete('date_from');
+    url.searchParams.delete('date_to');
+
+    // Add new filters
+    if (status) url.searchParams.set('status', status);
+    if (category) url.searchParams.set('category', category);
+    if (dateField) url.searchParams.set('date_field', dateField);
+    if (dateFrom) url.searchParams.set('date_from', dateFrom);
+    if (dateTo) url.searchParams.set('date_to', dateTo);
+
+    window.location.href = url.toString();
+}
+
+function clearFilters() {
+    window.location.href = window.location.pathname;
+}
+
+// Apply filters when Enter is pressed in date inputs
+document.getElementById('date-from').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') applyFilters();
+});
+
+document.getElementById('date-to').addEventListener('keypress', function(e) {
+    if (e.key === 'Enter') applyFilters();
+});
@@ -0,0 +1,125 @@
+"""
+Сводка задач пользователя для дашборда: GET /api/tasks/my/summary/.
+
+Итоги, статусы, overdue/upcoming и разбивка по категориям считаются одним
+запросом: условная агрегация (COUNT ... FILTER / CASE WHEN) по задачам
+владельца (индекс task_owner_created_idx) и та же агрегация по связям
+Task.categories с GROUP BY категории, склеенные UNION ALL. Задача в
+нескольких категориях входит в каждую из них, но в итоги — один раз.
+
+/api/tasks/my/summary/cached/ отдаёт сводку из кэша (CACHES['default']) на
+TASK_SUMMARY_CACHE_SECONDS. Запись сбрасывается, когда changes.write()
+фиксирует изменение задачи этого пользователя; изменение категории сбрасывает
+сводки всех пользователей. overdue/upcoming зависят от времени, поэтому
+кэш живёт недолго. С кэшем в памяти процесса (LocMemCache) сброс виден
+только в своём процессе — для нескольких воркеров нужен общий кэш.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import CharField, Count, F, IntegerField, Q, Value
+from django.utils import timezone
+
+from .models import Category, STATUS_CHOICES, Task
+
+OPEN_STATUSES = ['NEW', 'IN_PROGRESS', 'PENDING', 'BLOCKED']
+GENERATION_KEY = 'task_summary:generation'
+
+
+def summary_aggregates(now, prefix=''):
+    """Условные COUNT по полям задачи; prefix — путь к задаче ('task__' для таблицы связей)."""
+    pk = f'{prefix}id'
+    is_open = Q(**{f'{prefix}status__in': OPEN_STATUSES})
+    aggregates = {'total': Count(pk)}
+    for status, _ in STATUS_CHOICES:
+        aggregates[f'status_{status}'] = Count(pk, filter=Q(**{f'{prefix}status': status}))
+    aggregates['overdue'] = Count(pk, filter=is_open & Q(**{f'{prefix}deadline__lt': now}))
+    aggregates['upcoming'] = Count(pk, filter=is_open & Q(**{
+        f'{prefix}deadline__gte': now,
+        f'{prefix}deadline__lte': now + timezone.timedelta(days=7),
+    }))
+    return aggregates
+
+
+def summary_query(user, now):
+    """Строка итогов (category_id = NULL) и по строке на категорию — один SQL-запрос."""
+    totals = (
+        Task.objects.filter(owner=user)
+        .annotate(category_id=Value(None, IntegerField()), category_name=Value(None, CharField()))
+        .values('category_id', 'category_name')
+        .annotate(**summary_aggregates(now))
+        .order_by()
+    )
+    by_category = (
+        Task.categories.through.objects.filter(task__owner=user, category__is_deleted=False)
+        .annotate(category_name=F('category__name'))
+        .values('category_id', 'category_name')
+        .annotate(**summary_aggregates(now, prefix='task__'))
+        .order_by()
+    )
+    return totals.union(by_category, all=True)
+
+
+def build_summary(rows):
+    totals = {'total': 0, 'overdue': 0, 'upcoming': 0}
+    categories = []
+    for row in rows:
+        if row['category_id'] is None:
+            totals = row
+        else:
+            categories.append({
+                'id': row['category_id'],
+                'name': row['category_name'],
+                'task_count': row['total'],
+                'completed_tasks': row['status_DONE'],
+                'overdue_tasks': row['overdue'],
+                'upcoming_tasks': row['upcoming'],
+            })
+    categories.sort(key=lambda item: (-item['task_count'], item['name']))
+
+    status_stats = {status: totals.get(f'status_{status}', 0) for status, _ in STATUS_CHOICES}
+    return {
+        'summary': {
+            'total_tasks': totals['total'],
+            'completed_tasks': status_stats['DONE'],
+            'in_progress_tasks': status_stats['IN_PROGRESS'],
+            'overdue_tasks': totals['overdue'],
+            'upcoming_tasks': totals['upcoming'],
+        },
+        'status_breakdown': status_stats,
+        'category_breakdown': categories,
+    }
+
+
+def compute(user):
+    return build_summary(summary_query(user, timezone.now()))
+
+
+# ---------- cache ----------
+def cache_key(user_id):
+    return f'task_summary:{user_id}'
+
+
+def cached(user):
+    """(сводка, взята ли из кэша). Запись хранит поколение категорий, на котором посчитана."""
+    key = cache_key(user.pk)
+    stored = cache.get_many([key, GENERATION_KEY])
+    generation = stored.get(GENERATION_KEY, 0)
+    entry = stored.get(key)
+    if entry is not None and entry['generation'] == generation:
+        return entry['data'], True
+
+    data = compute(user)
+    cache.set(key, {'generation': generation, 'data': data}, settings.TASK_SUMMARY_CACHE_SECONDS)
+    return data, False
+
+
+def invalidate(rows):
+    """Вызывается из changes.write() после коммита: rows — записи ChangeLog."""
+    owners = {row.owner_id for row in rows if row.kind == Task._meta.model_name and row.owner_id is not None}
+    if owners:
+        cache.delete_many([cache_key(owner_id) for owner_id in owners])
+    if any(row.kind == Category._meta.model_name for row in rows):
+        # Переименование или удаление категории меняет сводки всех пользователей
+        cache.set(GENERATION_KEY, time.time_ns(), None)
@@ -0,0 +1,30 @@
+"""
+Версии строк для {% cache %} в шаблонах task_manager:
+
+    {% load cache task_fragments %}
+    {% cache fragment_cache_seconds task_row task.pk task|fragment_version %}
+
+Ключ фрагмента — id + updated_at, поэтому сохранение объекта само делает
+старый фрагмент недостижимым. updated_at задачи меняется и при изменении её
+подзадач и связей с категориями (signals.py); переименование категории задачу
+не трогает — в версию задачи входят updated_at её категорий. Категории
+берутся из prefetch_related, иначе фильтр делает запрос.
+"""
+from django import template
+
+register = template.Library()
+
+
+def timestamp(value):
+    return f'{value.timestamp():.6f}' if value is not None else ''
+
+
+@register.filter
+def fragment_version(obj):
+    parts = [timestamp(obj.updated_at)]
+    if hasattr(obj, 'categories'):
+        parts.extend(
+            f'{category.pk}@{timestamp(category.updated_at)}'
+            for category in obj.categories.all()
+        )
+    return '|'.join(parts)
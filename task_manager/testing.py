@@ -0,0 +1,39 @@
+"""
+Хелперы для тестов API.
+
+assert_constant_queries — число запросов к БД не должно зависеть от числа строк
+в ответе (нет N+1). Пример:
+
+    def grow():
+        task = Task.objects.create(..., owner=User.objects.create_user(...))
+        SubTask.objects.create(task=task, ...)
+
+    assert_constant_queries(lambda: client.get('/api/tasks/'), grow)
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_constant_queries(request, grow, rounds=3, using=DEFAULT_DB_ALIAS):
+    """
+    request() выполняет запрос (например client.get(...)), grow() добавляет данных,
+    которые попадут в ответ. Запрос выполняется rounds раз, между ними — grow().
+    Первый прогон прогревает кэши (ContentType, сессии и т.п.) и не учитывается.
+    Возвращает число запросов; при расхождении — AssertionError с SQL последнего прогона.
+    """
+    request()
+    counts = []
+    for index in range(rounds):
+        if index:
+            grow()
+        with CaptureQueriesContext(connections[using]) as context:
+            response = request()
+        status_code = getattr(response, 'status_code', 200)
+        if status_code >= 400:
+            raise AssertionError(f'Request failed with status {status_code}.')
+        counts.append(len(context.captured_queries))
+
+    if len(set(counts)) != 1:
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        raise AssertionError(f'Query count depends on the number of rows: {counts}\n{queries}')
+    return counts[0]
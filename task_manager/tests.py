@@ -1,81 +1,781 @@
-import time
-import functools
+import asyncio
+import gzip
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-def timer(func):
-    @functools.wraps(func)
-    def wrap():
-        start_time = time.time()
-        res = func()
-        end_time = time.time()
-        print(end_time - start_time)
-        return res
+from core import db_router, static
+from core.middleware import QueryBudgetExceeded, ReplicaPinningMiddleware
+from core.storage import CompressedManifestStaticFilesStorage
 
-    return wrap
+from . import counters
+from .events import ChangeLogBackend
+from .management.commands.import_tasks import Command as ImportTasksCommand
+from .models import Category, ChangeLog, SubTask, Task
+from .search import IContainsSearchBackend
+from .testing import assert_constant_queries
 
+User = get_user_model()
 
-def impl_dec(func):
-    @functools.wraps(func)
-    def wrap():
-        print("implement 2 decorator")
-        res = func()
-        return res
 
-    return wrap
+class QueryBudgetTests(TestCase):
+    url = reverse_lazy('task_manager_api:task-list-create')
 
+    def test_query_count_headers(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Query-Count'], str(len(queries)))
+        self.assertIn(f'desc="{len(queries)} queries"', response['Server-Timing'])
 
-@impl_dec
-@timer
-def print_hello():
-    time.sleep(3)
-    print("hello")
+    @override_settings(QUERY_BUDGET={'MODE': 'warn', 'VIEWS': {'task_manager_api:task-list-create': 0}})
+    def test_warn_mode_logs(self):
+        with self.assertLogs('core.query_budget', 'WARNING') as logs:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('budget is 0', logs.output[0])
 
+    @override_settings(QUERY_BUDGET={'MODE': 'raise', 'VIEWS': {'task_manager_api:task-list-create': 0}})
+    def test_raise_mode_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.url)
 
-# print_hello()
+    @override_settings(QUERY_BUDGET={'MODE': 'raise', 'VIEWS': {'task_manager_api:task-list-create': 100}})
+    def test_within_budget(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
 
 
-class Component:
-    def activate(self):
-        print("Base component activated")
+class SeedAndBenchmarkTests(TestCase):
+    def test_seed_data_then_benchmark(self):
+        call_command('seed_data', users=2, categories=3, tasks=5, subtasks=7, prefix='seed', seed=1,
+                     stdout=io.StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='seed-').count(), 2)
+        self.assertEqual(Category.objects.filter(name__startswith='seed-').count(), 3)
+        self.assertEqual(Task.objects.filter(title__startswith='seed-').count(), 5)
+        self.assertEqual(SubTask.objects.filter(title__startswith='seed-').count(), 7)
 
+        username = User.objects.filter(username__startswith='seed-').first().username
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('benchmark', iterations=2, warmup=0, match='/tasks/', username=username,
+                         json_path=path, stdout=io.StringIO())
+            with open(path) as file:
+                results = {result['url']: result for result in json.load(file)}
+        self.assertEqual(results['/api/tasks/my/']['status'], 200)
+        self.assertGreater(results['/api/tasks/my/']['queries'], 0)
 
-class Sensor(Component):
-    def activate(self):
-        print("Sensor activated")
-        super().activate()
 
+class ConstantQueriesTests(TestCase):
+    """Число запросов списков и выгрузки не растёт вместе с задачами, подзадачами и категориями."""
 
-class Controller(Component):
-    def activate(self):
-        print("Controller activated")
-        super().activate()
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.numbers = itertools.count()
 
+    def create_task(self, owner=None):
+        number = next(self.numbers)
+        task = Task.objects.create(
+            title=f'Task {number}',
+            description='Description',
+            deadline=timezone.now() + timedelta(days=3),
+            owner=owner or self.user,
+        )
+        task.categories.add(Category.objects.create(name=f'Category {number}'))
+        self.add_subtask(task)
+        return task
 
-class SmartDevice(Sensor, Controller):
-    def activate(self):
-        print("SmartDevice starting up")
-        super().activate()
-        print("SmartDevice ready")
+    def add_subtask(self, task):
+        number = next(self.numbers)
+        return SubTask.objects.create(
+            title=f'SubTask {number}',
+            description='Description',
+            task=task,
+            deadline=timezone.now() + timedelta(days=1),
+            owner=task.owner,
+        )
 
+    def get(self, url):
+        return lambda: self.client.get(url)
 
-# device = SmartDevice()
-# device.activate()
+    def test_task_list(self):
+        self.create_task()
+        assert_constant_queries(self.get(reverse('task_manager_api:task-list-create')), self.create_task)
 
-# SmartDevice starting up
-# Sensor activated
-# Controller activated
-# Base component activated
-# SmartDevice ready
+    def test_subtask_list(self):
+        self.create_task()
+        assert_constant_queries(self.get(reverse('task_manager_api:subtask-list-create')), self.create_task)
 
-def test_func(input_data: list = []) -> list:
-    input_data.append(2)
+    def test_my_tasks(self):
+        self.create_task()
+        other = User.objects.create_user(username='other', password='password')
 
-    return input_data
+        def grow():
+            self.create_task()
+            # Чужие задачи в ответ не попадают, но и не должны добавлять запросов
+            self.create_task(owner=other)
 
+        assert_constant_queries(self.get(reverse('task_manager_api:my-tasks')), grow)
 
-print(test_func())
-print(test_func())
-print(test_func())
-print(test_func([3]))
-print(test_func([4]))
-print(test_func())
\ No newline at end of file
+    def test_task_detail(self):
+        task = self.create_task()
+
+        def grow():
+            self.add_subtask(task)
+            task.categories.add(Category.objects.create(name=f'Category {next(self.numbers)}'))
+
+        url = reverse('task_manager_api:task-detail', args=[task.pk])
+        assert_constant_queries(self.get(url), grow)
+
+    def test_export(self):
+        self.create_task()
+        url = reverse('task_manager_api:task-export')
+
+        def request():
+            response = self.client.get(url)
+            # Потоковый ответ: запросы выполняются при чтении тела
+            b''.join(response.streaming_content)
+            return response
+
+        assert_constant_queries(request, self.create_task)
+
+
+@override_settings(TASK_SUBTASKS_EMBED_LIMIT=2)
+class EmbeddedSubtasksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.task = Task.objects.create(title='Task', description='Description', deadline=timezone.now())
+        for number in range(4):
+            SubTask.objects.create(title=f'SubTask {number}', description='', task=cls.task, deadline=timezone.now())
+
+    def subtasks(self, url, **params):
+        data = APIClient().get(url, params).json()
+        task = data['results'][0] if 'results' in data else data
+        self.assertEqual(task['subtasks_count'], 4)
+        return [subtask['title'] for subtask in task['subtasks']]
+
+    def test_list_embeds_recent_subtasks(self):
+        url = reverse('task_manager_api:task-list-create')
+        self.assertEqual(self.subtasks(url), ['SubTask 3', 'SubTask 2'])
+        self.assertEqual(len(self.subtasks(url, subtasks_limit=3)), 3)
+
+    def test_detail_embeds_all_subtasks(self):
+        url = reverse('task_manager_api:task-detail', args=[self.task.pk])
+        self.assertEqual(len(self.subtasks(url)), 4)
+        self.assertEqual(self.subtasks(url, subtasks_limit=1), ['SubTask 3'])
+
+
+class FragmentCacheTests(TestCase):
+    url = reverse_lazy('task_manager:tasks')
+
+    def setUp(self):
+        cache.clear()
+        self.task = Task.objects.create(title='Task', description='', deadline=timezone.now())
+        self.category = Category.objects.create(name='Home')
+        self.task.categories.add(self.category)
+
+    def test_row_is_cached_until_task_changes(self):
+        self.assertContains(self.client.get(self.url), '<div class="task-title">Task</div>')
+        # QuerySet.update без updated_at не меняет версию — строка берётся из кэша
+        Task.objects.filter(pk=self.task.pk).update(title='Stale')
+        self.assertContains(self.client.get(self.url), '<div class="task-title">Task</div>')
+
+        self.task.title = 'Renamed'
+        self.task.save()
+        self.assertContains(self.client.get(self.url), '<div class="task-title">Renamed</div>')
+
+    def test_category_rename_invalidates_row(self):
+        self.assertContains(self.client.get(self.url), '<span class="category-tag">Home</span>')
+        updated_at = Task.objects.get(pk=self.task.pk).updated_at
+
+        self.category.name = 'Work'
+        self.category.save()
+        self.assertEqual(Task.objects.get(pk=self.task.pk).updated_at, updated_at)
+        response = self.client.get(self.url)
+        self.assertContains(response, '<span class="category-tag">Work</span>')
+        self.assertNotContains(response, '<span class="category-tag">Home</span>')
+
+
+@override_settings(SUBTASKS_PAGE_SIZE=2)
+class TaskDetailPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.task = Task.objects.create(title='Task', description='', deadline=timezone.now())
+        for number, status in enumerate(['NEW', 'DONE', 'NEW']):
+            SubTask.objects.create(
+                title=f'SubTask {number}', description='', task=cls.task, deadline=timezone.now(), status=status,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get(reverse('task_manager:task_detail', args=[self.task.pk]), params)
+
+    def test_stats(self):
+        context = self.get(subtask_status='NEW').context
+        self.assertEqual((context['total_count'], context['filtered_count']), (3, 2))
+        self.assertEqual(dict(context['status_counts']), {'New': 2, 'In progress': 0, 'Pending': 0, 'Blocked': 0, 'Done': 1})
+        self.assertEqual([subtask.title for subtask in context['subtasks']], ['SubTask 2', 'SubTask 0'])
+        self.assertIsNone(context['next_cursor'])
+
+    def test_keyset_pages(self):
+        first = self.get().context
+        self.assertEqual([subtask.title for subtask in first['subtasks']], ['SubTask 2', 'SubTask 1'])
+        self.assertIsNotNone(first['next_cursor'])
+
+        second = self.get(subtask_after=first['next_cursor']).context
+        self.assertEqual([subtask.title for subtask in second['subtasks']], ['SubTask 0'])
+        self.assertEqual((second['page_start'], second['page_end']), (3, 3))
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(second['total_count'], 3)
+
+
+class TaskListPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            Task.objects.create(title=f'Task {number}', description='Description', deadline=timezone.now())
+
+    @override_settings(TASKS_PAGE_SIZE=2, TASKS_COUNT_LIMIT=2)
+    def test_total_is_a_capped_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('task_manager:tasks'))
+        self.assertEqual([task.title for task in response.context['tasks']], ['Task 2', 'Task 1'])
+        self.assertEqual(response.context['total_count'], 2)
+        self.assertContains(response, '2+')
+        # Без COUNT(*) OVER (): он читает всю выборку до LIMIT
+        self.assertFalse([query for query in queries if 'OVER' in query['sql']])
+        [count] = [query['sql'] for query in queries if 'COUNT(*)' in query['sql']]
+        self.assertIn('LIMIT 3', count)
+
+    def test_query_count_does_not_grow(self):
+        numbers = itertools.count(3)
+
+        def grow():
+            Task.objects.create(title=f'Task {next(numbers)}', description='Description', deadline=timezone.now())
+
+        assert_constant_queries(lambda: self.client.get(reverse('task_manager:tasks')), grow)
+
+
+class BulkStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='owner', password='password')
+        other = User.objects.create_user(username='other', password='password')
+        deadline = timezone.now()
+        cls.new = [
+            Task.objects.create(title=f'New {number}', description='', deadline=deadline, owner=cls.user)
+            for number in range(3)
+        ]
+        cls.done = Task.objects.create(title='Done', description='', deadline=deadline, owner=cls.user, status='DONE')
+        cls.foreign = Task.objects.create(title='Foreign', description='', deadline=deadline, owner=other)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, data, query=''):
+        return self.client.post(f'{reverse("task_manager_api:task-bulk-status")}{query}', data, format='json')
+
+    def test_ids(self):
+        ids = [self.new[0].pk, self.done.pk, self.foreign.pk]
+        response = self.post({'status': 'DONE', 'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['ids'], [self.new[0].pk])
+        self.assertEqual(response.json()['skipped'], sorted([self.done.pk, self.foreign.pk]))
+        self.assertEqual(Task.objects.get(pk=self.foreign.pk).status, 'NEW')
+
+    def test_filter(self):
+        response = self.post({'status': 'IN_PROGRESS'}, '?status=NEW')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json()['ids']), sorted(task.pk for task in self.new))
+        self.assertEqual(Task.objects.filter(status='IN_PROGRESS').count(), 3)
+
+    def test_filter_is_required(self):
+        response = self.post({'status': 'DONE'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.filter(owner=self.user, status='NEW').count(), 3)
+
+    @override_settings(TASK_BULK_STATUS_MAX_ROWS=2)
+    def test_filter_matching_too_many_rows(self):
+        response = self.post({'status': 'DONE'}, '?status=NEW')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.filter(status='NEW', owner=self.user).count(), 3)
+
+
+class TaskSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='owner', password='password')
+        other = User.objects.create_user(username='other', password='password')
+        now = timezone.now()
+        home, cls.work = Category.objects.create(name='Home'), Category.objects.create(name='Work')
+        overdue = Task.objects.create(title='Overdue', description='', deadline=now - timedelta(days=1), owner=cls.user)
+        overdue.categories.add(home, cls.work)
+        done = Task.objects.create(title='Done', description='', deadline=now - timedelta(days=1), owner=cls.user, status='DONE')
+        done.categories.add(home)
+        cls.upcoming = Task.objects.create(
+            title='Upcoming', description='', deadline=now + timedelta(days=3), owner=cls.user, status='IN_PROGRESS',
+        )
+        Task.objects.create(title='Foreign', description='', deadline=now, owner=other).categories.add(home)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, name):
+        return self.client.get(reverse(f'task_manager_api:{name}'))
+
+    def test_summary(self):
+        with self.assertNumQueries(1):
+            data = self.get('my-tasks-summary').json()
+        self.assertEqual(data['summary'], {
+            'total_tasks': 3, 'completed_tasks': 1, 'in_progress_tasks': 1, 'overdue_tasks': 1, 'upcoming_tasks': 1,
+        })
+        self.assertEqual(data['status_breakdown']['NEW'], 1)
+        self.assertEqual(
+            [(item['name'], item['task_count'], item['completed_tasks'], item['overdue_tasks'])
+             for item in data['category_breakdown']],
+            [('Home', 2, 1, 1), ('Work', 1, 0, 1)],
+        )
+
+    def test_cached_summary_is_invalidated_by_changes(self):
+        self.assertEqual(self.get('my-tasks-summary-cached')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get('my-tasks-summary-cached')['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upcoming.status = 'DONE'
+            self.upcoming.save()
+        response = self.get('my-tasks-summary-cached')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['summary']['completed_tasks'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.work.name = 'Office'
+            self.work.save()
+        response = self.get('my-tasks-summary-cached')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Office', [item['name'] for item in response.json()['category_breakdown']])
+
+
+class AsyncAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='password')
+
+    async def test_session_is_not_accepted_by_sync_or_async_views(self):
+        await self.async_client.aforce_login(self.user)
+        for name in ('my-tasks', 'async-my-tasks'):
+            response = await self.async_client.get(reverse(f'task_manager_api:{name}'))
+            self.assertEqual(response.status_code, 401, name)
+
+    async def test_bearer_token_is_accepted_by_sync_and_async_views(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        for name in ('my-tasks', 'async-my-tasks'):
+            response = await self.async_client.get(reverse(f'task_manager_api:{name}'), headers=headers)
+            self.assertEqual(response.status_code, 200, name)
+
+
+class TaskBulkCreateTests(TestCase):
+    url = reverse_lazy('task_manager_api:task-bulk-create')
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name='Home')
+        self.numbers = itertools.count()
+
+    def item(self, **fields):
+        return {
+            'title': f'Task {next(self.numbers)}', 'description': 'Description',
+            'deadline': (timezone.now() + timedelta(days=1)).isoformat(),
+            'category_ids': [self.category.pk], **fields,
+        }
+
+    def test_partial_success(self):
+        Task.objects.create(title='Taken', description='', deadline=timezone.now())
+        items = [self.item(), self.item(title='Taken'), self.item(deadline='soon'), self.item()]
+        response = self.client.post(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.json()['results']],
+                         ['created', 'error', 'error', 'created'])
+        created = Task.objects.filter(owner=self.user)
+        self.assertEqual(created.count(), 2)
+        self.assertEqual(Task.categories.through.objects.filter(task__in=created, category=self.category).count(), 2)
+        self.assertEqual(counters.read()[counters.category_key(self.category.pk)], 2)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        self.batch_size = 1
+
+        def grow():
+            self.batch_size += 2
+
+        def request():
+            return self.client.post(self.url, [self.item() for _ in range(self.batch_size)], format='json')
+
+        assert_constant_queries(request, grow)
+
+
+class SparseFieldsetsTests(TestCase):
+    url = reverse_lazy('task_manager_api:task-list-create')
+
+    @classmethod
+    def setUpTestData(cls):
+        task = Task.objects.create(title='Task', description='Description', deadline=timezone.now())
+        task.categories.add(Category.objects.create(name='Home'))
+        SubTask.objects.create(title='SubTask', description='', task=task, deadline=timezone.now())
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(self.url, params)
+        return response, [query['sql'] for query in queries]
+
+    def test_fields(self):
+        response, queries = self.get(fields='id,title')
+        self.assertEqual(response.json()['results'], [{'id': Task.objects.get().pk, 'title': 'Task'}])
+        # Связи не запрошены — и не загружаются
+        self.assertFalse([sql for sql in queries if 'task_manager_subtask' in sql or 'task_manager_task_categories' in sql])
+
+    def test_expand(self):
+        response, _ = self.get(expand='categories')
+        task = response.json()['results'][0]
+        self.assertEqual(task['categories'], [{'id': Category.objects.get().pk, 'name': 'Home'}])
+        self.assertNotIn('subtasks', task)
+        self.assertIn('subtasks_count', task)
+
+    def test_unknown_fields_are_rejected(self):
+        response, _ = self.get(fields='id,secret', expand='owner')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'fields', 'expand'})
+
+
+class ConditionalGetTests(TestCase):
+    list_url = reverse_lazy('task_manager_api:task-list-create')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.task = Task.objects.create(title='Task', description='', deadline=timezone.now())
+        self.category = Category.objects.create(name='Home')
+        self.task.categories.add(self.category)
+        self.detail_url = reverse('task_manager_api:task-detail', kwargs={'pk': self.task.pk})
+
+    def assertNotModified(self, url):
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # 304 — только агрегаты валидатора, без выборки и сериализации
+        self.assertTrue(all('MAX(' in query['sql'] for query in queries))
+        return etag
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list(self):
+        etag = self.assertNotModified(self.list_url)
+        SubTask.objects.create(title='SubTask', description='', task=self.task, deadline=timezone.now())
+        self.assertModified(self.list_url, etag)
+
+        etag = self.assertNotModified(self.list_url)
+        self.task.delete()
+        self.assertModified(self.list_url, etag)
+
+    def test_detail(self):
+        etag = self.assertNotModified(self.detail_url)
+        self.assertTrue(self.client.get(self.detail_url).has_header('Last-Modified'))
+        self.category.name = 'Work'
+        self.category.save()
+        self.assertModified(self.detail_url, etag)
+
+    def test_missing_detail_is_404(self):
+        url = reverse('task_manager_api:task-detail', kwargs={'pk': self.task.pk + 1})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            Task.objects.create(title=f'Task {number}', description='Description', deadline=timezone.now())
+
+    async def test_asgi_export_streams_chunks(self):
+        response = await self.async_client.get(reverse('task_manager_api:task-export'), {'chunk_size': 1})
+        self.assertTrue(response.is_async)
+        # Каждая пачка — отдельная часть ответа, а не весь файл после сборки
+        parts = [part async for part in response.streaming_content]
+        self.assertEqual(len(parts), 3)
+        self.assertEqual([json.loads(part)['title'] for part in parts], ['Task 0', 'Task 1', 'Task 2'])
+
+
+REPLICAS = {**settings.DATABASE_REPLICAS, 'ALIASES': ['replica1']}
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaPinningTests(TestCase):
+    """Клиент с Authorization: Bearer без cookie после записи читает с default."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='password')
+        self.factory = RequestFactory()
+
+    def bearer(self, user):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+    def middleware(self, wrote=False):
+        def view(request):
+            state = db_router.get_state()
+            state.wrote = wrote
+            # Как DRF после аутентификации по токену
+            request.user = self.user
+            self.used_replica = state.use_replica
+            return HttpResponse()
+
+        return ReplicaPinningMiddleware(view)
+
+    def test_read_after_write_without_cookie(self):
+        self.middleware()(self.factory.get('/', headers=self.bearer(self.user)))
+        self.assertTrue(self.used_replica)
+
+        response = self.middleware(wrote=True)(self.factory.post('/', headers=self.bearer(self.user)))
+        self.assertIn(REPLICAS['COOKIE_NAME'], response.cookies)
+
+        # Cookie клиент не вернул: default по ключу пользователя
+        self.middleware()(self.factory.get('/', headers=self.bearer(self.user)))
+        self.assertFalse(self.used_replica)
+
+        other = User.objects.create_user(username='other', password='password')
+        self.middleware()(self.factory.get('/', headers=self.bearer(other)))
+        self.assertTrue(self.used_replica)
+
+
+class TaskCountersTests(TestCase):
+    """Счётчики, которые ведут сигналы, совпадают с пересчитанными rebuild_task_counters."""
+
+    def assertCountersConsistent(self):
+        self.assertEqual(counters.diff(counters.read(), counters.compute()), {})
+        call_command('rebuild_task_counters', verify=True, stdout=io.StringIO())
+
+    def test_signals_keep_counters_in_sync(self):
+        home, work = Category.objects.create(name='Home'), Category.objects.create(name='Work')
+        first = Task.objects.create(title='First', description='', deadline=timezone.now())
+        second = Task.objects.create(title='Second', description='', deadline=timezone.now(), status='DONE')
+        first.categories.add(home, work)
+        work.task_set.add(second)
+        self.assertCountersConsistent()
+
+        first.status = 'IN_PROGRESS'
+        first.save()
+        first.categories.remove(home)
+        work.task_set.clear()
+        second.categories.set([home])
+        self.assertCountersConsistent()
+        self.assertEqual(counters.read()[counters.status_key('IN_PROGRESS')], 1)
+
+        first.delete()
+        self.assertCountersConsistent()
+        self.assertEqual(counters.read()[counters.TOTAL_KEY], 1)
+
+    def test_verify_reports_drift(self):
+        Task.objects.create(title='Task', description='', deadline=timezone.now())
+        counters.bump({counters.TOTAL_KEY: 5})
+        with self.assertRaises(CommandError):
+            call_command('rebuild_task_counters', verify=True, stdout=io.StringIO())
+        call_command('rebuild_task_counters', stdout=io.StringIO())
+        self.assertCountersConsistent()
+
+
+class ChangeLogTests(TestCase):
+    def test_created_at_is_commit_time(self):
+        user = User.objects.create_user(username='owner', password='password')
+        committed_at = timezone.now() + timedelta(minutes=5)
+        with self.captureOnCommitCallbacks() as callbacks:
+            task = Task.objects.create(title='Task', description='', deadline=timezone.now(), owner=user)
+        # Транзакция «длилась» пять минут: запись ленты получает время коммита
+        with mock.patch('task_manager.changes.timezone.now', return_value=committed_at):
+            for callback in callbacks:
+                callback()
+
+        row = ChangeLog.objects.get(kind='task', object_id=task.pk)
+        self.assertEqual(row.created_at, committed_at)
+
+    def test_queryset_delete_of_categories_is_recorded(self):
+        kept, deleted = Category.objects.create(name='Kept'), Category.objects.create(name='Deleted')
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.filter(pk=deleted.pk).delete()
+
+        self.assertEqual(list(Category.objects.all()), [kept])
+        self.assertTrue(Category.all_objects.get(pk=deleted.pk).is_deleted)
+        self.assertTrue(ChangeLog.objects.filter(kind='category', object_id=deleted.pk, action='deleted').exists())
+
+    def test_events_wait_for_settle_horizon(self):
+        backend = ChangeLogBackend(mock.Mock(category_subscribers=0), {'POLL_SECONDS': 1})
+        settled = ChangeLog.objects.create(kind='task', object_id=1, action='created')
+        ChangeLog.objects.filter(pk=settled.pk).update(created_at=timezone.now() - timedelta(minutes=1))
+        # Свежая запись: транзакция с меньшим id ещё может закоммититься
+        ChangeLog.objects.create(kind='task', object_id=2, action='created')
+
+        events, position = backend.fetch(0)
+        self.assertEqual([event['id'] for event in events], [1])
+        self.assertEqual(position, settled.pk)
+
+
+class ChangeLogBackendTests(SimpleTestCase):
+    async def test_poller_survives_database_errors(self):
+        broker = mock.Mock(category_subscribers=0)
+        backend = ChangeLogBackend(broker, {'POLL_SECONDS': 0})
+        event = {'type': 'task', 'id': 1, 'action': 'created', 'owner_id': None}
+        responses = [([], 0), DatabaseError('connection lost'), ([event], 1)]
+
+        def poll(position):
+            return responses.pop(0) if responses else ([], position)
+
+        with mock.patch.object(backend, 'poll', side_effect=poll) as mocked, \
+                self.assertLogs('task_manager.events', 'ERROR'):
+            backend.start(asyncio.get_running_loop())
+            while responses or mocked.call_count < 4:
+                await asyncio.sleep(0.01)
+            backend.stop()
+        broker.dispatch.assert_called_once_with([event])
+        # После ошибки опрос продолжился с той же позиции
+        self.assertEqual([call.args[0] for call in mocked.call_args_list[:4]], [None, 0, 0, 1])
+
+    async def test_finished_poller_is_restarted(self):
+        backend = ChangeLogBackend(mock.Mock(), {'POLL_SECONDS': 0})
+
+        async def run():
+            pass
+
+        with mock.patch.object(backend, 'run', run):
+            backend.start(asyncio.get_running_loop())
+            first = backend.task
+            await first
+            await asyncio.sleep(0)
+            self.assertIsNone(backend.task)
+            backend.start(asyncio.get_running_loop())
+            self.assertIsNot(backend.task, first)
+            await backend.task
+
+
+class IContainsSearchBackendTests(TestCase):
+    def test_every_term_matches_some_field(self):
+        deadline = timezone.now()
+        Task.objects.create(title='Write report', description='quarterly numbers', deadline=deadline)
+        Task.objects.create(title='Report bug', description='login page', deadline=deadline)
+        Task.objects.create(title='Plan sprint', description='', deadline=deadline)
+
+        found = IContainsSearchBackend().search(Task.objects.all(), ['report', 'NUMBERS'], ['title', 'description'])
+        self.assertEqual([task.title for task in found], ['Write report'])
+
+
+class ImportTasksTests(TestCase):
+    def import_rows(self, *rows, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.ndjson')
+            with open(path, 'w') as file:
+                file.writelines(json.dumps(row) + '\n' for row in rows)
+            call_command('import_tasks', path, stdout=open(os.devnull, 'w'), **options)
+            errors_path = f'{path}.errors.ndjson'
+            if not os.path.exists(errors_path):
+                return []
+            with open(errors_path) as file:
+                return [json.loads(line) for line in file]
+
+    def row(self, title):
+        return {'title': title, 'description': 'Imported', 'deadline': '2030-01-01T00:00:00Z', 'categories': ['Home']}
+
+    def test_deleted_category_is_a_row_error(self):
+        Category.objects.create(name='Home').delete()
+        errors = self.import_rows(self.row('Task'))
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Category is deleted: Home', json.dumps(errors[0]))
+        self.assertFalse(Task.objects.exists())
+
+    def test_rolled_back_batch_does_not_cache_category_ids(self):
+        command = ImportTasksCommand(stdout=io.StringIO())
+        command.kind, command.create_categories, command.owner = 'task', True, None
+        command.load_categories()
+        rows = [(0, self.row('Task'))]
+
+        with mock.patch('task_manager.bulk.insert_tasks', side_effect=DatabaseError), self.assertRaises(DatabaseError):
+            command.import_chunk(rows)
+        self.assertFalse(Category.all_objects.filter(name='Home').exists())
+
+        # Следующая пачка создаёт категорию заново, а не ссылается на откаченный id
+        self.assertEqual(command.import_chunk(rows), (1, []))
+        self.assertEqual([c.name for c in Task.objects.get(title='Task').categories.all()], ['Home'])
+
+    def test_create_categories_restores_deleted_category(self):
+        category = Category.objects.create(name='Home')
+        category.delete()
+        errors = self.import_rows(self.row('Task'), create_categories=True)
+        self.assertEqual(errors, [])
+        category.refresh_from_db()
+        self.assertFalse(category.is_deleted)
+        self.assertEqual(list(Task.objects.get(title='Task').categories.all()), [category])
+
+
+class CompressedStaticStorageTests(SimpleTestCase):
+    big = b'body { color: red; }\n' * 50
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        # Как после копирования collectstatic: исходники уже в STATIC_ROOT
+        files = {'big.css': self.big, 'small.css': b'p {}\n'}
+        for name, content in files.items():
+            with open(os.path.join(self.root, name), 'wb') as file:
+                file.write(content)
+
+        self.storage = CompressedManifestStaticFilesStorage(location=self.root)
+        paths = {name: (self.storage, name) for name in files}
+        for name, _, result in self.storage.post_process(paths):
+            self.assertNotIsInstance(result, Exception, name)
+
+    def test_compressed_copies(self):
+        big = self.storage.path(self.storage.stored_name('big.css'))
+        small = self.storage.path(self.storage.stored_name('small.css'))
+        self.assertNotEqual(big, self.storage.path('big.css'))
+        with open(f'{big}.gz', 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), self.big)
+        # Меньше MIN_SIZE — без сжатой копии
+        self.assertFalse(os.path.exists(f'{small}.gz'))
+
+    def test_serve_hashed_file(self):
+        name = self.storage.stored_name('big.css')
+        with override_settings(STATIC_ROOT=self.root):
+            response = static.serve(RequestFactory().get(f'/static/{name}', HTTP_ACCEPT_ENCODING='br;q=0, gzip'), name)
+            plain = static.serve(RequestFactory().get(f'/static/{name}'), name)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.big)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(plain.streaming_content), self.big)
+        response.close()
+        plain.close()
@@ -1,6 +1,12 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Count, Q
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from datetime import timedelta, datetime
+from .filters import SubTaskFilterSet, TaskFilterSet, form_filter_data
 from .forms import TaskForm, SubTaskForm, CategoryForm
 from django.utils import timezone
 from .models import Task, SubTask, Category
@@ -10,92 +16,113 @@ def index(request):
     # Show a simple dashboard or redirect to tasks
     return redirect('task_manager:tasks')
 
-def tasks(request):
-    tasks = Task.objects.all().order_by('-created_at')
-    categories = Category.objects.all()
+# ---------- keyset pagination ----------
+def encode_task_cursor(task, offset):
+    raw = f'{task.created_at.isoformat()}|{task.pk}|{offset}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
 
-    # Filter by status if provided
-    status_filter = request.GET.get('status')
-    if status_filter:
-        tasks = tasks.filter(status=status_filter)
 
-    # Filter by category if provided
-    category_filter = request.GET.get('category')
-    if category_filter:
-        tasks = tasks.filter(categories__id=category_filter)
+def decode_task_cursor(cursor):
+    """(created_at, id, сколько задач до страницы) или None для неверного курсора."""
+    try:
+        raw = base64.urlsafe_b64decode((cursor + '=' * (-len(cursor) % 4)).encode()).decode()
+        created_at, pk, offset = raw.split('|')
+        return datetime.fromisoformat(created_at), int(pk), int(offset)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
 
-    # Filter by date range
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    date_field = request.GET.get('date_field', 'created_at')  # Default to created_at
 
-    if date_from:
-        try:
-            date_from_parsed = datetime.strptime(date_from, '%Y-%m-%d').date()
-            if date_field == 'deadline':
-                tasks = tasks.filter(deadline__date__gte=date_from_parsed)
-            else:  # created_at
-                tasks = tasks.filter(created_at__date__gte=date_from_parsed)
-        except ValueError:
-            pass  # Invalid date format, ignore filter
-
-    if date_to:
-        try:
-            date_to_parsed = datetime.strptime(date_to, '%Y-%m-%d').date()
-            if date_field == 'deadline':
-                tasks = tasks.filter(deadline__date__lte=date_to_parsed)
-            else:  # created_at
-                tasks = tasks.filter(created_at__date__lte=date_to_parsed)
-        except ValueError:
-            pass  # Invalid date format, ignore filter
+def tasks(request):
+    """
+    Задачи страницами по TASKS_PAGE_SIZE, порядок (-created_at, -id) — по индексу task_created_idx.
+    Следующая страница — ?after=<курсор последней задачи>: WHERE по ключу вместо OFFSET.
+    Общее число — отдельный COUNT не дальше TASKS_COUNT_LIMIT строк («1000+»), категории — одним prefetch.
+    """
+    categories = Category.objects.all()
+    date_field = request.GET.get('date_field', 'created_at')  # Default to created_at
+    # Фильтры те же, что у /api/tasks/ (task_manager/filters.py); неверные значения игнорируются
+    filterset = TaskFilterSet(
+        form_filter_data(request.GET),
+        queryset=Task.objects.order_by('-created_at', '-id').prefetch_related('categories'),
+    )
+    tasks = filterset.qs
+    current = filterset.form.cleaned_data
+
+    cursor = decode_task_cursor(request.GET.get('after', ''))
+    offset = 0
+    if cursor is not None:
+        created_at, pk, offset = cursor
+        tasks = tasks.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    page = list(tasks[:settings.TASKS_PAGE_SIZE + 1])
+    has_next = len(page) > settings.TASKS_PAGE_SIZE
+    page = page[:settings.TASKS_PAGE_SIZE]
+    # COUNT(*) FROM (... LIMIT n + 1): точное число не стоит чтения всей выборки на каждой странице
+    total_count = filterset.qs.order_by()[:settings.TASKS_COUNT_LIMIT + 1].count()
 
     context = {
-        'tasks': tasks,
+        'tasks': page,
+        'total_count': min(total_count, settings.TASKS_COUNT_LIMIT),
+        'total_count_capped': total_count > settings.TASKS_COUNT_LIMIT,
+        'page_start': offset + 1,
+        'page_end': offset + len(page),
+        'next_cursor': encode_task_cursor(page[-1], offset + len(page)) if has_next else None,
+        'is_first_page': cursor is None,
         'categories': categories,
         'status_choices': Task._meta.get_field('status').choices,
-        'current_status': status_filter,
-        'current_category': int(category_filter) if category_filter else None,
-        'current_date_from': date_from,
-        'current_date_to': date_to,
+        'current_status': current.get('status'),
+        'current_category': current.get('category'),
+        'current_date_from': request.GET.get('date_from'),
+        'current_date_to': request.GET.get('date_to'),
         'current_date_field': date_field,
+        'fragment_cache_seconds': settings.TEMPLATE_FRAGMENT_CACHE_SECONDS,
     }
     return render(request, 'task_manager/tasks.html', context)
 
-def task_detail(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
-    all_subtasks = task.subtasks.all()
+def subtask_stats(task, filterset):
+    """
+    Счётчики подзадач одним GROUP BY status по индексу (task, status):
+    всего, подходящих под фильтр и по каждому статусу.
+    """
+    filterset.is_valid()
+    matched = Count('id')
+    if any(value not in (None, '') for value in filterset.form.cleaned_data.values()):
+        matched = Count('id', filter=Q(pk__in=filterset.qs.values('pk')))
+    rows = task.subtasks.order_by().values('status').annotate(total=Count('id'), matched=matched)
+
+    by_status = {code: 0 for code, _ in SubTask._meta.get_field('status').choices}
+    total = filtered = 0
+    for row in rows:
+        by_status[row['status']] = row['total']
+        total += row['total']
+        filtered += row['matched']
+    return total, filtered, by_status
 
-    # Filter subtasks by status if provided
-    subtask_status_filter = request.GET.get('subtask_status')
-    if subtask_status_filter:
-        all_subtasks = all_subtasks.filter(status=subtask_status_filter)
 
-    # Filter subtasks by date range
-    subtask_date_from = request.GET.get('subtask_date_from')
-    subtask_date_to = request.GET.get('subtask_date_to')
+def task_detail(request, task_id):
+    """
+    Подзадачи страницами по SUBTASKS_PAGE_SIZE (?subtask_after=<курсор>, как в tasks()).
+    Счётчики — subtask_stats() одним запросом, без COUNT по каждому набору.
+    """
+    # Категории нужны и для шаблона, и для версии фрагментов (task_fragments)
+    task = get_object_or_404(Task.objects.prefetch_related('categories'), id=task_id)
     subtask_date_field = request.GET.get('subtask_date_field', 'created_at')  # Default to created_at
-
-    if subtask_date_from:
-        try:
-            date_from_parsed = datetime.strptime(subtask_date_from, '%Y-%m-%d').date()
-            if subtask_date_field == 'deadline':
-                all_subtasks = all_subtasks.filter(deadline__date__gte=date_from_parsed)
-            else:  # created_at
-                all_subtasks = all_subtasks.filter(created_at__date__gte=date_from_parsed)
-        except ValueError:
-            pass  # Invalid date format, ignore filter
-
-    if subtask_date_to:
-        try:
-            date_to_parsed = datetime.strptime(subtask_date_to, '%Y-%m-%d').date()
-            if subtask_date_field == 'deadline':
-                all_subtasks = all_subtasks.filter(deadline__date__lte=date_to_parsed)
-            else:  # created_at
-                all_subtasks = all_subtasks.filter(created_at__date__lte=date_to_parsed)
-        except ValueError:
-            pass  # Invalid date format, ignore filter
-
-    subtasks = all_subtasks.order_by('-created_at')
+    filterset = SubTaskFilterSet(
+        form_filter_data(request.GET, prefix='subtask_'),
+        queryset=task.subtasks.order_by('-created_at', '-id'),
+    )
+    subtasks = filterset.qs
+    total_count, filtered_count, status_counts = subtask_stats(task, filterset)
+
+    cursor = decode_task_cursor(request.GET.get('subtask_after', ''))
+    offset = 0
+    if cursor is not None:
+        created_at, pk, offset = cursor
+        subtasks = subtasks.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    page = list(subtasks[:settings.SUBTASKS_PAGE_SIZE + 1])
+    has_next = len(page) > settings.SUBTASKS_PAGE_SIZE
+    page = page[:settings.SUBTASKS_PAGE_SIZE]
 
     # Calculate deadline status
     now = timezone.now()
@@ -106,16 +133,24 @@ def task_detail(request, task_id):
     elif task.deadline <= now + timedelta(days=7):
         deadline_status = 'upcoming'  # Due within 7 days
 
+    status_choices = SubTask._meta.get_field('status').choices
     context = {
         'task': task,
-        'subtasks': subtasks,
-        'all_subtasks': task.subtasks.all(),  # For statistics (unfiltered)
+        'subtasks': page,
+        'total_count': total_count,
+        'filtered_count': filtered_count,
+        'status_counts': [(name, status_counts[code]) for code, name in status_choices],
+        'page_start': offset + 1,
+        'page_end': offset + len(page),
+        'next_cursor': encode_task_cursor(page[-1], offset + len(page)) if has_next else None,
+        'is_first_page': cursor is None,
         'deadline_status': deadline_status,
-        'status_choices': SubTask._meta.get_field('status').choices,
-        'current_subtask_status': subtask_status_filter,
-        'current_subtask_date_from': subtask_date_from,
-        'current_subtask_date_to': subtask_date_to,
+        'status_choices': status_choices,
+        'current_subtask_status': filterset.form.cleaned_data.get('status'),
+        'current_subtask_date_from': request.GET.get('subtask_date_from'),
+        'current_subtask_date_to': request.GET.get('subtask_date_to'),
         'current_subtask_date_field': subtask_date_field,
+        'fragment_cache_seconds': settings.TEMPLATE_FRAGMENT_CACHE_SECONDS,
     }
     return render(request, 'task_manager/task_detail.html', context)
 
@@ -0,0 +1,179 @@
+"""
+JWT-аутентификация по заголовку Authorization: Bearer или по cookie access_token
+(её ставит CookieTokenObtainPairView).
+
+Пользователь access-токена кэшируется в процессе по jti на JWT_USER_CACHE['TTL']
+секунд (не больше JWT_USER_CACHE['SIZE'] записей) — без запроса к auth_user на
+каждый запрос. Что запись устарела, процесс узнаёт из кэша Django
+JWT_USER_CACHE['CACHE'] — одним get_many на запрос:
+- версия пользователя растёт при его сохранении или удалении (деактивация,
+  смена пароля); запись с прежней версией загружается заново;
+- при выходе (LogoutAPIView) jti access-токена отзывается до истечения токена.
+С общим кэшем (Redis и т.п.) это видят все воркеры; с LocMemCache по
+умолчанию — только текущий процесс.
+
+Запросы с токеном из cookie проверяют CSRF на небезопасных методах, как
+SessionAuthentication: cookie браузер отправляет и с чужих сайтов.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+
+class UserCache:
+    """
+    jti -> (пользователь, версия пользователя, до когда) с вытеснением самых старых.
+    Версии и отозванные jti — в общем кэше, записи с пользователями — в процессе.
+    """
+    key_prefix = 'jwt_user:'
+
+    def __init__(self, options):
+        self.options = options
+        self.ttl = options['TTL']
+        self.size = options['SIZE']
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    @cached_property
+    def shared(self):
+        return caches[self.options['CACHE']]
+
+    def revoked_key(self, jti):
+        return f'{self.key_prefix}revoked:{jti}'
+
+    def version_key(self, user_id):
+        return f'{self.key_prefix}version:{user_id}'
+
+    def state(self, jti, user_id):
+        """(отозван ли jti, текущая версия пользователя)."""
+        revoked_key, version_key = self.revoked_key(jti), self.version_key(user_id)
+        values = self.shared.get_many([revoked_key, version_key])
+        return revoked_key in values, values.get(version_key, 0)
+
+    async def astate(self, jti, user_id):
+        revoked_key, version_key = self.revoked_key(jti), self.version_key(user_id)
+        values = await self.shared.aget_many([revoked_key, version_key])
+        return revoked_key in values, values.get(version_key, 0)
+
+    def get(self, jti, version):
+        with self.lock:
+            entry = self.entries.get(jti)
+            if entry is None:
+                return None
+            user, entry_version, expires_at = entry
+            if expires_at < time.monotonic() or entry_version != version:
+                del self.entries[jti]
+                return None
+        # Копия: пользователь запроса не должен делить состояние с другими потоками
+        return copy.copy(user)
+
+    def set(self, jti, user, version):
+        # version прочитана до загрузки пользователя: если он изменился за это
+        # время, версия уже выросла и следующий get() запись отбросит
+        with self.lock:
+            self.entries[jti] = (user, version, time.monotonic() + self.ttl)
+            self.entries.move_to_end(jti)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        version_key = self.version_key(user_id)
+        # Без срока: вытесненная версия вернулась бы к 0 и оживила старые записи
+        if not self.shared.add(version_key, 1, timeout=None):
+            try:
+                self.shared.incr(version_key)
+            except ValueError:
+                # Ключ вытеснен между add() и incr()
+                self.shared.add(version_key, 1, timeout=None)
+
+    def revoke(self, jti, exp):
+        with self.lock:
+            self.entries.pop(jti, None)
+        timeout = exp - int(time.time())
+        if timeout > 0:
+            self.shared.set(self.revoked_key(jti), True, timeout)
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate_user(instance.pk)
+
+
+def revoke_access_token(token):
+    """Выход: access-токен больше не принимается ни одним процессом с тем же кэшем."""
+    user_cache.revoke(token[api_settings.JTI_CLAIM], token['exp'])
+
+
+class CookieJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication + cookie access_token + кэш пользователя по jti."""
+
+    def authenticate(self, request):
+        raw_token, from_cookie = self.get_raw_token_from_request(request)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if from_cookie:
+            self.enforce_csrf(request)
+        return self.get_user(validated_token), validated_token
+
+    def get_raw_token_from_request(self, request):
+        """(сырой токен, взят ли он из cookie); заголовок важнее cookie."""
+        header = self.get_header(request)
+        if header is not None:
+            raw_token = self.get_raw_token(header)
+            if raw_token is not None:
+                return raw_token, False
+        raw_token = request.COOKIES.get(settings.AUTH_COOKIES['ACCESS']['NAME'])
+        return (raw_token.encode() if raw_token else None), True
+
+    @staticmethod
+    def enforce_csrf(request):
+        SessionAuthentication().enforce_csrf(request)
+
+    @staticmethod
+    def token_ids(validated_token):
+        """(jti, user_id) токена; None — кэш для такого токена не используется."""
+        try:
+            return validated_token[api_settings.JTI_CLAIM], int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get_cached_user(self, validated_token, state):
+        """Пользователь из кэша; None — нужно загрузить из БД. state — user_cache.state()."""
+        revoked, version = state
+        if revoked:
+            raise AuthenticationFailed(_('Token is revoked'), code='token_revoked')
+        return user_cache.get(validated_token[api_settings.JTI_CLAIM], version)
+
+    def load_user(self, validated_token, state):
+        # Проверки is_active и смены пароля — в JWTAuthentication.get_user
+        user = super().get_user(validated_token)
+        user_cache.set(validated_token[api_settings.JTI_CLAIM], user, state[1])
+        return user
+
+    def get_user(self, validated_token):
+        ids = self.token_ids(validated_token)
+        if ids is None:
+            return super().get_user(validated_token)
+        state = user_cache.state(*ids)
+        return self.get_cached_user(validated_token, state) or self.load_user(validated_token, state)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def check_refresh_token_rotation(app_configs, **kwargs):
+    """
+    CachedRefreshToken пропускает БД, когда кэш чёрного списка не знает jti.
+    Повторное использование отозванного токена тогда ловит только INSERT в
+    BlacklistedToken при ротации — без неё кэш становится единственной защитой.
+    """
+    errors = []
+    options = getattr(settings, 'SIMPLE_JWT', {})
+    for error_id, name in (('users.E001', 'ROTATE_REFRESH_TOKENS'), ('users.E002', 'BLACKLIST_AFTER_ROTATION')):
+        if not options.get(name, False):
+            errors.append(Error(
+                f"SIMPLE_JWT['{name}'] must be True.",
+                hint='users.tokens.CachedRefreshToken relies on blacklisting every rotated refresh token.',
+                id=error_id,
+            ))
+    return errors
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие refresh-токены (OutstandingToken) и их записи в чёрном списке '
+        '(BlacklistedToken) пачками по id. Истёкший токен и так не пройдёт проверку exp, '
+        'поэтому запись о нём больше не нужна. В отличие от flushexpiredtokens не удаляет '
+        'всё одним запросом с загрузкой всех объектов в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        outstanding = blacklisted = 0
+        while True:
+            # Истёкшие токены — самые старые, поэтому поиск по id находит их сразу
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=now)
+                .order_by('id').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            # Сначала чёрный список: каскад из OutstandingToken искал бы его строки ещё раз
+            blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {outstanding} expired outstanding token(s) and {blacklisted} blacklisted token(s).'
+        ))
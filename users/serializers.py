@@ -3,6 +3,9 @@ from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.validators import EmailValidator
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+
+from .tokens import CachedRefreshToken
 
 User = get_user_model()
 
@@ -32,4 +35,9 @@ class RegisterSerializer(serializers.Serializer):
         user = User(**validated_data)
         user.set_password(password)
         user.save()
-        return user
\ No newline at end of file
+        return user
+
+
+class CookieTokenRefreshSerializer(TokenRefreshSerializer):
+    # Чёрный список через кэш процесса и INSERT вместо get_or_create (users/tokens.py)
+    token_class = CachedRefreshToken
@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import tokens
+from .authentication import CookieJWTAuthentication, UserCache, revoke_access_token
+from .checks import check_refresh_token_rotation
+from .tokens import BlacklistCache, CachedRefreshToken
+
+User = get_user_model()
+
+OPTIONS = {'LRU_SIZE': 100, 'CAPACITY': 1000, 'ERROR_RATE': 0.01, 'CACHE': 'default'}
+
+
+class SharedBlacklistCache(BlacklistCache):
+    # Общий кэш (Redis и т.п.) в тестах — LocMemCache, который считается общим
+    authoritative = True
+
+
+class BlacklistCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='password')
+        self.shared = LocMemCache('token-blacklist-tests', {})
+
+    def worker(self):
+        cache = SharedBlacklistCache(OPTIONS)
+        cache.shared = self.shared
+        return cache
+
+    def check(self, cache, token):
+        original = tokens.blacklist_cache
+        tokens.blacklist_cache = cache
+        try:
+            # verify() в конструкторе вызывает check_blacklist()
+            CachedRefreshToken(str(token))
+        finally:
+            tokens.blacklist_cache = original
+
+    def blacklist(self, cache, token):
+        original = tokens.blacklist_cache
+        tokens.blacklist_cache = cache
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                token.blacklist()
+        finally:
+            tokens.blacklist_cache = original
+
+    def test_revocation_in_another_process(self):
+        first, second = self.worker(), self.worker()
+        token = CachedRefreshToken.for_user(self.user)
+        self.check(second, token)
+
+        self.blacklist(first, token)
+        with self.assertNumQueries(0), self.assertRaises(TokenError):
+            self.check(second, token)
+
+    def test_revocation_before_start(self):
+        token = CachedRefreshToken.for_user(self.user)
+        self.blacklist(self.worker(), token)
+        self.shared.clear()
+
+        # Нового воркера нет в общем кэше: фильтр прогревается из БД
+        with self.assertRaises(TokenError):
+            self.check(self.worker(), token)
+
+    def test_process_local_cache_checks_database(self):
+        local = BlacklistCache(OPTIONS)
+        self.assertFalse(local.authoritative)
+        token = CachedRefreshToken.for_user(self.user)
+        with self.assertNumQueries(1):
+            self.check(local, token)
+
+
+class RotationCheckTests(TestCase):
+    def test_rotation_required(self):
+        with override_settings(SIMPLE_JWT={'ROTATE_REFRESH_TOKENS': True, 'BLACKLIST_AFTER_ROTATION': False}):
+            self.assertEqual([error.id for error in check_refresh_token_rotation(None)], ['users.E002'])
+
+
+class UserCacheTests(TestCase):
+    """Сохранение пользователя и выход в одном процессе видны кэшу другого."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='password')
+        self.token = AccessToken.for_user(self.user)
+        # Кэш другого воркера: свои записи, общий кэш Django
+        self.worker = mock.patch('users.authentication.user_cache', UserCache(settings.JWT_USER_CACHE))
+        self.worker.start()
+        self.addCleanup(self.worker.stop)
+
+    def authenticate(self):
+        return CookieJWTAuthentication().get_user(self.token)
+
+    def test_cached_until_user_changes(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+        self.worker.stop()
+        self.user.is_active = False
+        self.user.save()
+        self.worker.start()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_logout_revokes_token(self):
+        self.authenticate()
+        self.worker.stop()
+        revoke_access_token(self.token)
+        self.worker.start()
+        with self.assertRaisesMessage(AuthenticationFailed, 'Token is revoked'):
+            self.authenticate()
@@ -0,0 +1,176 @@
+"""
+Refresh-токен с дешёвой проверкой чёрного списка (token_blacklist).
+
+RefreshToken из simplejwt на каждом обновлении делает около десяти запросов:
+EXISTS по BlacklistedToken, пользователь трижды, get_or_create для
+OutstandingToken и BlacklistedToken. CachedRefreshToken делает то же за четыре:
+- check_blacklist() сначала смотрит в BlacklistCache. Без БД отклоняется jti,
+  отозванный в этом процессе или опубликованный в общем кэше, и пропускается
+  jti, которого нет ни там, ни в фильтре, прогретом из БД при старте. Совпадение
+  по фильтру проверяется в БД. Если кэш процесса-локальный (LocMemCache),
+  отзывы из других воркеров он не видит: тогда всё, кроме точных попаданий,
+  проверяется в БД.
+- blacklist() — INSERT в BlacklistedToken. Уникальный token_id не даёт отозвать
+  токен дважды: повтор уже отозванного токена (из другого процесса или
+  параллельным запросом) отклоняется здесь, даже если кэш его упустил
+  (вытеснение ключа). Поэтому ротация с BLACKLIST_AFTER_ROTATION обязательна —
+  её требуют проверки users.E001/E002 (checks.py).
+- outstand() создаёт запись нового токена без повторной загрузки пользователя.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+class BloomFilter:
+    """Битовый массив на capacity элементов с долей ложных срабатываний error_rate."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position // 8] |= 1 << (position % 8)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self.positions(key))
+
+
+class BlacklistCache:
+    """
+    Отозванные jti, которые можно отклонить без БД:
+    - recent — последние LRU_SIZE, отозванные или найденные в БД этим процессом;
+    - общий кэш (TOKEN_BLACKLIST_CACHE['CACHE']) — всё, что отозвано любым
+      процессом после его старта, до истечения токена;
+    - filter — фильтр Блума по BlacklistedToken неистёкших токенов, загружается
+      при первой проверке. Вместе с общим кэшем покрывает весь чёрный список.
+    """
+    key_prefix = 'token_blacklist:'
+
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.Lock()
+        self.recent = OrderedDict()
+        self.filter = None
+
+    @cached_property
+    def shared(self):
+        return caches[self.options['CACHE']]
+
+    @cached_property
+    def authoritative(self):
+        # Кэш в памяти процесса не видит отзывов из других воркеров
+        return not isinstance(self.shared, (LocMemCache, DummyCache))
+
+    def load(self):
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .values_list('token__jti', flat=True)
+        )
+        bloom = BloomFilter(max(self.options['CAPACITY'], len(jtis)), self.options['ERROR_RATE'])
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    def remember(self, jti):
+        with self.lock:
+            self.recent[jti] = True
+            self.recent.move_to_end(jti)
+            if len(self.recent) > self.options['LRU_SIZE']:
+                self.recent.popitem(last=False)
+
+    def add(self, jti, expires_at):
+        """Отзыв jti: в этом процессе и, до истечения токена, в общем кэше для остальных."""
+        self.remember(jti)
+        timeout = expires_at - int(time.time())
+        if timeout > 0:
+            self.shared.set(self.key_prefix + jti, True, timeout)
+
+    def is_blacklisted(self, jti):
+        """True — точно отозван, False — точно нет, None — проверить в БД."""
+        with self.lock:
+            if jti in self.recent:
+                self.recent.move_to_end(jti)
+                return True
+        if not self.authoritative:
+            return None
+        if self.shared.get(self.key_prefix + jti):
+            self.remember(jti)
+            return True
+        if self.filter is None:
+            # Отзывы во время загрузки уже попадают в общий кэш
+            bloom = self.load()
+            with self.lock:
+                if self.filter is None:
+                    self.filter = bloom
+        return None if jti in self.filter else False
+
+
+blacklist_cache = BlacklistCache(settings.TOKEN_BLACKLIST_CACHE)
+
+
+class CachedRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = blacklist_cache.is_blacklisted(jti)
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            if blacklisted:
+                blacklist_cache.remember(jti)
+        if blacklisted:
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token_id = OutstandingToken.objects.filter(jti=jti).values_list('id', flat=True).first()
+        if token_id is None:
+            # Токен выпущен без записи в OutstandingToken (до подключения blacklist)
+            result = super().blacklist()
+        else:
+            try:
+                with transaction.atomic():
+                    result = BlacklistedToken.objects.create(token_id=token_id), True
+            except IntegrityError:
+                blacklist_cache.remember(jti)
+                raise TokenError(_('Token is blacklisted'))
+        # После коммита: пока INSERT не виден, другие процессы не должны считать токен отозванным
+        transaction.on_commit(lambda: blacklist_cache.add(jti, self.payload['exp']))
+        return result
+
+    def outstand(self):
+        # Новый jti (set_jti() перед outstand()) — get_or_create не нужен
+        token = OutstandingToken.objects.create(
+            user_id=self.payload.get(api_settings.USER_ID_CLAIM),
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+        # Как get_or_create() в RefreshToken.outstand()
+        return token, True
@@ -4,9 +4,12 @@ from django.views.generic import detail
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
-from .serializers import RegisterSerializer
+from rest_framework_simplejwt.tokens import TokenError
+from .authentication import revoke_access_token
+from .serializers import CookieTokenRefreshSerializer, RegisterSerializer
+from .tokens import CachedRefreshToken
 
 
 def set_token_cookies(response: Response, access: str = None, refresh: str = None):
@@ -42,6 +45,8 @@ def clear_token_cookies(response: Response):
 
 class RegisterAPIView(APIView):
     permission_classes = [permissions.AllowAny]
+    # Истёкшая cookie access_token не должна мешать регистрации и входу
+    authentication_classes = []
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -55,6 +60,7 @@ class RegisterAPIView(APIView):
 
 class CookieTokenObtainPairView(TokenObtainPairView):
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
 
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
@@ -68,6 +74,8 @@ class CookieTokenObtainPairView(TokenObtainPairView):
 
 class CookieTokenRefreshView(TokenRefreshView):
     permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    serializer_class = CookieTokenRefreshSerializer
 
     def post(self, request, *args, **kwargs):
         cfg = settings.AUTH_COOKIES
@@ -77,7 +85,11 @@ class CookieTokenRefreshView(TokenRefreshView):
             data['refresh'] = refresh_cookie
 
         serializer = self.get_serializer(data=data)
-        serializer.is_valid(raise_exception=True)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            # Истёкший или отозванный токен — 401, как в TokenViewBase.post
+            raise InvalidToken(e.args[0])
 
         access = serializer.validated_data.get('access')
         refresh = serializer.validated_data.get('refresh')
@@ -97,10 +109,14 @@ class LogoutAPIView(APIView):
 
         if refresh_cookie:
             try:
-                token = RefreshToken(refresh_cookie)
+                # Отзыв попадает и в кэш чёрного списка процесса (users/tokens.py)
+                token = CachedRefreshToken(refresh_cookie)
                 token.blacklist()
             except TokenError:
                 pass
+        # Кэш пользователя по jti (users/authentication.py) больше не примет этот access-токен
+        if request.auth is not None:
+            revoke_access_token(request.auth)
 
         resp = Response({"detail": "Logout successful."}, status=status.HTTP_200_OK)
         clear_token_cookies(resp)